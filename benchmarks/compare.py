@@ -0,0 +1,70 @@
+"""Compares two benchmark result files and reports regressions.
+
+Usage::
+
+    python -m benchmarks.compare old.json new.json --threshold 0.1
+
+Exits with status 1 if any benchmark case became slower by more than the threshold.
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1) -> List[Dict[str, Any]]:
+    """Compare the minimum time per call of all cases contained in both reports.
+
+    The minimum over all repetitions is the least noisy estimate of the runtime, as noise only ever adds time.
+
+    Args:
+        baseline: Report of the reference run, as written by :mod:`benchmarks.run`.
+        current: Report of the run to be checked.
+        threshold: Relative slowdown from which a case counts as regression, e.g. 0.1 for 10%.
+
+    Returns:
+        One row per case with the keys `name`, `baseline`, `current`, `ratio` and `regression`.
+    """
+    baseline_times = {result["name"]: result["min"] for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        if result["name"] not in baseline_times:
+            continue
+        ratio = result["min"] / baseline_times[result["name"]]
+        rows.append({
+            "name": result["name"],
+            "baseline": baseline_times[result["name"]],
+            "current": result["min"],
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold,
+        })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]]):
+    width = max((len(row["name"]) for row in rows), default=4)
+    print(f"{'case':<{width}}  {'baseline':>12}  {'current':>12}  {'change':>8}")
+    for row in rows:
+        marker = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['name']:<{width}}  {row['baseline'] * 1e6:>10.1f}µs  {row['current'] * 1e6:>10.1f}µs  "
+              f"{(row['ratio'] - 1) * 100:>+7.1f}%{marker}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two LEAF benchmark result files.")
+    parser.add_argument("baseline", help="Path of the reference JSON result file")
+    parser.add_argument("current", help="Path of the JSON result file to be checked")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative slowdown that counts as regression, e.g. 0.1 for 10%%")
+    args = parser.parse_args(argv)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold)
+    print_comparison(rows)
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
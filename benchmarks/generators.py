@@ -0,0 +1,118 @@
+"""Synthetic infrastructures and applications of parameterized size for the benchmarks."""
+import math
+from typing import Callable, Dict
+
+import networkx as nx
+import numpy as np
+
+from leaf.application import Application, SourceTask, ProcessingTask, SinkTask
+from leaf.infrastructure import Infrastructure, Node, Link
+from leaf.power import PowerModelNode, PowerModelLink
+
+
+def hierarchical_infrastructure(size: int, rng: np.random.Generator, **kwargs) -> Infrastructure:
+    """Three-tier infrastructure of one cloud, `size / 20` fog nodes and edge nodes that connect to a random fog node.
+
+    Args:
+        size: Total number of nodes.
+        rng: Random number generator for link latencies and the assignment of edge nodes to fog nodes.
+        kwargs: Passed to :class:`~leaf.infrastructure.Infrastructure`.
+    """
+    infrastructure = Infrastructure(**kwargs)
+    cloud = Node("cloud", power_model=PowerModelNode(power_per_cu=0.5))
+    fog_nodes = [Node(f"fog_{i}", cu=400, power_model=PowerModelNode(max_power=200, static_power=30))
+                 for i in range(max(1, size // 20))]
+    for fog_node in fog_nodes:
+        _add_bidirectional_link(infrastructure, fog_node, cloud, bandwidth=1e9, energy_per_bit=6000e-9,
+                                latency=rng.uniform(5, 20))
+    for i in range(size - len(fog_nodes) - 1):
+        edge_node = Node(f"edge_{i}", cu=100, power_model=PowerModelNode(max_power=5, static_power=1))
+        fog_node = fog_nodes[rng.integers(len(fog_nodes))]
+        _add_bidirectional_link(infrastructure, edge_node, fog_node, bandwidth=30e6, energy_per_bit=300e-9,
+                                latency=rng.uniform(1, 10))
+    return infrastructure
+
+
+def grid_infrastructure(size: int, rng: np.random.Generator, **kwargs) -> Infrastructure:
+    """Square grid of fog nodes where every node is connected to its horizontal and vertical neighbors.
+
+    Args:
+        size: Total number of nodes, rounded down to the next square number.
+        rng: Random number generator for link latencies.
+        kwargs: Passed to :class:`~leaf.infrastructure.Infrastructure`.
+    """
+    side = max(2, int(math.sqrt(size)))
+    graph = nx.grid_2d_graph(side, side)
+    nodes = {(x, y): _fog_node(f"node_{x}_{y}") for x, y in graph.nodes}
+    return _infrastructure_from_graph(graph, nodes, rng, **kwargs)
+
+
+def scale_free_infrastructure(size: int, rng: np.random.Generator, **kwargs) -> Infrastructure:
+    """Barabási-Albert graph of fog nodes, which has few highly connected hubs and many weakly connected nodes.
+
+    Args:
+        size: Total number of nodes.
+        rng: Random number generator for the graph structure and link latencies.
+        kwargs: Passed to :class:`~leaf.infrastructure.Infrastructure`.
+    """
+    graph = nx.barabasi_albert_graph(size, 2, seed=int(rng.integers(2 ** 31)))
+    nodes = {i: _fog_node(f"node_{i}") for i in graph.nodes}
+    return _infrastructure_from_graph(graph, nodes, rng, **kwargs)
+
+
+TOPOLOGIES: Dict[str, Callable[..., Infrastructure]] = {
+    "hierarchical": hierarchical_infrastructure,
+    "grid": grid_infrastructure,
+    "scale_free": scale_free_infrastructure,
+}
+
+
+def application_dag(size: int, rng: np.random.Generator, source_node: Node, sink_node: Node) -> Application:
+    """Application with one source task, `size - 2` processing tasks and one sink task.
+
+    Every processing task receives data flows from one or two random previous tasks. The sink task receives data flows
+    from the last (up to) four processing tasks.
+
+    Args:
+        size: Total number of tasks, at least 3.
+        rng: Random number generator for the DAG structure, compute units and bit rates.
+        source_node: Node the source task is bound to.
+        sink_node: Node the sink task is bound to.
+    """
+    if size < 3:
+        raise ValueError(f"An application needs at least 3 tasks, got {size}.")
+    application = Application()
+    tasks = [SourceTask(cu=1, bound_node=source_node)]
+    application.add_task(tasks[0])
+    predecessors = rng.integers(0, np.arange(1, size - 1)[:, None], size=(size - 2, 2))
+    fan_in = rng.integers(1, 3, size=size - 2)
+    # Integer resource demands, so that releasing them again restores the exact previous utilization
+    cus = rng.integers(1, 4, size=size - 2)
+    bit_rates = rng.integers(100, 1000, size=(size - 2, 2))
+    for i in range(size - 2):
+        incoming = {int(predecessors[i, j]): int(bit_rates[i, j]) for j in range(fan_in[i])}
+        task = ProcessingTask(cu=int(cus[i]))
+        application.add_task(task, incoming_data_flows=[(tasks[src], bit_rate) for src, bit_rate in incoming.items()])
+        tasks.append(task)
+    application.add_task(SinkTask(cu=1, bound_node=sink_node),
+                         incoming_data_flows=[(task, 100) for task in tasks[-4:] if task is not tasks[0]])
+    return application
+
+
+def _fog_node(name: str) -> Node:
+    return Node(name, cu=1e6, power_model=PowerModelNode(max_power=200, static_power=30))
+
+
+def _infrastructure_from_graph(graph: nx.Graph, nodes: Dict, rng: np.random.Generator, **kwargs) -> Infrastructure:
+    infrastructure = Infrastructure(**kwargs)
+    latencies = rng.uniform(1, 10, size=graph.number_of_edges())
+    for (u, v), latency in zip(graph.edges, latencies):
+        _add_bidirectional_link(infrastructure, nodes[u], nodes[v], bandwidth=1e9, energy_per_bit=1000e-9,
+                                latency=float(latency))
+    return infrastructure
+
+
+def _add_bidirectional_link(infrastructure: Infrastructure, a: Node, b: Node, bandwidth: float,
+                            energy_per_bit: float, latency: float):
+    infrastructure.add_link(Link(a, b, bandwidth=bandwidth, power_model=PowerModelLink(energy_per_bit), latency=latency))
+    infrastructure.add_link(Link(b, a, bandwidth=bandwidth, power_model=PowerModelLink(energy_per_bit), latency=latency))
@@ -0,0 +1,106 @@
+"""Runs the benchmark suite and writes the results as JSON.
+
+Usage::
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --sizes 100 1000 --topologies grid --filter measure_power
+    python -m benchmarks.run --sizes 100000 --repeat 3
+    python -m benchmarks.run --output new.json --compare old.json --threshold 0.1
+"""
+import argparse
+import datetime
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from typing import Any, Dict, List, Optional
+
+from benchmarks.compare import compare, print_comparison
+from benchmarks.generators import TOPOLOGIES
+from benchmarks.suite import BENCHMARKS, Case, cases
+
+DEFAULT_SIZES = [100, 1000, 10000]  # Add 100000 via --sizes for large-scale runs, which take several minutes
+
+
+def run_case(case: Case, repeat: int = 5, min_time: float = 0.2) -> Dict[str, Any]:
+    """Time a single benchmark case.
+
+    The number of calls per repetition is chosen such that a repetition takes at least `min_time` seconds.
+    """
+    operation = BENCHMARKS[case.benchmark](**case.params)
+    timer = timeit.Timer(operation)
+    number = 1
+    while True:  # Like timeit.Timer.autorange(), but with a configurable minimum time
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.1))
+    times = [elapsed / number for elapsed in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "name": case.name,
+        "benchmark": case.benchmark,
+        "params": case.params,
+        "number": number,
+        "repeat": repeat,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "times": times,
+    }
+
+
+def metadata() -> Dict[str, Any]:
+    """Describe the environment the benchmarks are run in."""
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the LEAF micro-benchmarks.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Numbers of entities")
+    parser.add_argument("--topologies", nargs="+", default=list(TOPOLOGIES), choices=list(TOPOLOGIES))
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this string")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per case")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per repetition")
+    parser.add_argument("--output", help="Path of the JSON result file")
+    parser.add_argument("--compare", help="Path of a JSON result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative slowdown that counts as regression when comparing, e.g. 0.1 for 10%%")
+    args = parser.parse_args(argv)
+
+    results = []
+    for case in cases(args.sizes, args.topologies):
+        if args.filter not in case.name:
+            continue
+        gc.collect()
+        result = run_case(case, repeat=args.repeat, min_time=args.min_time)
+        print(f"{case.name}: {result['min'] * 1e6:.1f} µs", flush=True)
+        results.append(result)
+    report = {"metadata": metadata(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        comparison = compare(baseline, report, args.threshold)
+        print_comparison(comparison)
+        if any(row["regression"] for row in comparison):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""End-to-end scaling benchmark of the smart city traffic scenario.
+
+Runs the scenario of `examples/smart_city_traffic` for every combination of the given scale parameters over a shortened
+simulated time and reports the simulation throughput, the number of processed events, the peak memory usage and the
+wall time spent per subsystem. Every configuration runs in a fresh process, so that module-level settings and the
+peak memory usage of different configurations do not affect each other.
+
+Usage::
+
+    python -m benchmarks.smart_city --cars 75 150 300 --streets 4 8 --fog-dcs 0 6 --time 600 --output city.json
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import simpy
+
+from benchmarks.run import metadata
+from examples.smart_city_traffic.city import City
+from examples.smart_city_traffic.main import infrastructure_power_meters
+from examples.smart_city_traffic.mobility import MobilityManager
+from examples.smart_city_traffic.sweep import configure
+from leaf.power import MeterGroup
+from leaf.profiling import Profiler
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Subsystems by the prefixes of the names of profiled processes and functions, the first match counts
+SUBSYSTEMS = [
+    ("orchestration", "CityOrchestrator."),
+    ("mobility", "MobilityManager."),
+    ("wifi", "City."),
+    ("metering", "MeterGroup."),
+    ("metering", "PowerMeter."),
+]
+
+
+class CountingEnvironment(simpy.Environment):
+    """Simpy environment which counts the number of processed events."""
+
+    def __init__(self, initial_time: float = 0):
+        super().__init__(initial_time)
+        self.processed_events = 0
+
+    def step(self):
+        self.processed_events += 1
+        super().step()
+
+
+def run_configuration(configuration: Dict[str, Any], simulation_time: float, seed: int = 0,
+                      profile: bool = True) -> Dict[str, Any]:
+    """Run the smart city scenario with the given settings and measure its performance.
+
+    Args:
+        configuration: Settings of `examples.smart_city_traffic.settings` to override, e.g. `MAX_CARS_PER_MINUTE`.
+        simulation_time: Simulated seconds.
+        seed: Seed of the scenario's random number generator.
+        profile: Attribute the wall time to subsystems via :class:`~leaf.profiling.Profiler`, which adds some overhead.
+    """
+    configure(RNG=np.random.default_rng(seed), **configuration)
+    env = CountingEnvironment()
+    profiler = Profiler(env) if profile else None
+    if profiler is not None:
+        profiler.attach()
+
+    start = time.perf_counter()
+    smart_city = City(env)
+    if profiler is not None:
+        profiler.instrument(smart_city.orchestrator, "place", "place_many")
+    mobility_manager = MobilityManager(smart_city)
+    env.process(mobility_manager.run(env))
+    env.process(MeterGroup(infrastructure_power_meters(smart_city).values()).run(env))
+    setup_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    env.run(until=simulation_time)
+    wall_time = time.perf_counter() - start
+
+    result = {
+        "configuration": configuration,
+        "simulation_time": simulation_time,
+        "setup_time": setup_time,
+        "wall_time": wall_time,
+        "sim_seconds_per_wall_second": simulation_time / wall_time,
+        "events": env.processed_events,
+        "events_per_second": env.processed_events / wall_time,
+        "nodes": len(smart_city.infrastructure.nodes()),
+        "links": len(smart_city.infrastructure.links()),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    if profiler is not None:
+        profiler.detach()
+        result["subsystems"] = _subsystem_times(profiler, wall_time)
+    return result
+
+
+def _subsystem_times(profiler: Profiler, wall_time: float) -> Dict[str, float]:
+    """Sum up the self time of all profiled processes and functions by subsystem.
+
+    The remaining time is spent in the SimPy event loop, including the overhead of the profiler.
+    """
+    times = {name: 0.0 for name, _ in SUBSYSTEMS}
+    times["other"] = 0.0
+    stats = profiler.to_dataframe()
+    for name, self_time in zip(stats["name"], stats["self_time"]):
+        subsystem = next((subsystem for subsystem, prefix in SUBSYSTEMS if name.startswith(prefix)), "other")
+        times[subsystem] += self_time
+    times["event_loop"] = wall_time - sum(times.values())
+    return times
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 1024 ** 2 if sys.platform == "darwin" else max_rss / 1024  # Bytes on macOS, kilobytes on Linux
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the smart city scenario at different scales.")
+    parser.add_argument("--cars", type=int, nargs="+", default=[75], help="Values of MAX_CARS_PER_MINUTE")
+    parser.add_argument("--streets", type=int, nargs="+", default=[4], help="Values of STREETS_PER_AXIS")
+    parser.add_argument("--fog-dcs", type=int, nargs="+", default=[0], help="Values of FOG_DCS")
+    parser.add_argument("--time", type=float, default=600, help="Simulated seconds per configuration")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-profile", action="store_true", help="Do not measure the time per subsystem")
+    parser.add_argument("--output", help="Path of the JSON result file")
+    args = parser.parse_args(argv)
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for cars, streets, fog_dcs in itertools.product(args.cars, args.streets, args.fog_dcs):
+        configuration = {"MAX_CARS_PER_MINUTE": cars, "STREETS_PER_AXIS": streets, "FOG_DCS": fog_dcs}
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(run_configuration, configuration, args.time, args.seed,
+                                     not args.no_profile).result()
+        results.append(result)
+        line = (f"cars={cars:<5} streets={streets:<3} fog_dcs={fog_dcs:<3} "
+                f"{result['sim_seconds_per_wall_second']:>9.1f} sim-s/s  {result['events_per_second']:>9.0f} events/s")
+        if result["peak_rss_mb"] is not None:
+            line += f"  {result['peak_rss_mb']:>7.1f} MB"
+        for name, seconds in result.get("subsystems", {}).items():
+            line += f"  {name}={seconds:.2f}s"
+        print(line, flush=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"metadata": metadata(), "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
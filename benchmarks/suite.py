@@ -0,0 +1,114 @@
+"""Benchmarks of the core operations of LEAF.
+
+Every benchmark is a function which receives the parameters of a case, prepares all required objects and returns the
+operation to be timed. Preparation is not part of the measured time.
+"""
+import inspect
+from typing import Callable, Dict, List, NamedTuple
+
+import numpy as np
+import simpy
+
+from benchmarks.generators import TOPOLOGIES, application_dag
+from leaf.application import Application, ProcessingTask
+from leaf.infrastructure import Infrastructure, Node
+from leaf.orchestrator import Orchestrator
+from leaf.power import PowerMeter
+
+APPLICATION_SIZE = 10  # Number of tasks of the application placed by `orchestrator.place`
+METER_STEPS = 10  # Number of measurements per iteration of `power_meter.run`
+
+# Power engines by the `Infrastructure` keyword argument which enables them. Engines that are not supported by the
+# checked out version of LEAF are skipped, so the suite can compare hot paths across older commits as well.
+_ENGINE_PARAMETERS = {"incremental": "incremental_power", "vectorized": "vectorized_power"}
+ENGINES = ["default"] + [engine for engine, parameter in _ENGINE_PARAMETERS.items()
+                         if parameter in inspect.signature(Infrastructure).parameters]
+
+
+class Case(NamedTuple):
+    benchmark: str
+    params: Dict[str, object]
+
+    @property
+    def name(self) -> str:
+        return self.benchmark + "".join(f"[{key}={value}]" for key, value in self.params.items())
+
+
+class RandomOrchestrator(Orchestrator):
+    """Places processing tasks on a random node of the infrastructure."""
+
+    def __init__(self, infrastructure: Infrastructure, rng: np.random.Generator):
+        super().__init__(infrastructure)
+        self.rng = rng
+        self._nodes = infrastructure.nodes()
+
+    def _processing_task_placement(self, processing_task: ProcessingTask, application: Application) -> Node:
+        return self._nodes[self.rng.integers(len(self._nodes))]
+
+
+def measure_power(topology: str, size: int, engine: str) -> Callable[[], object]:
+    """`Infrastructure.measure_power()` of an infrastructure where half of all nodes run a task."""
+    rng = np.random.default_rng(0)
+    kwargs = {_ENGINE_PARAMETERS[engine]: True} if engine != "default" else {}
+    infrastructure = TOPOLOGIES[topology](size, rng, **kwargs)
+    nodes = infrastructure.nodes()
+    for i in rng.choice(len(nodes), size=len(nodes) // 2, replace=False):
+        ProcessingTask(cu=1).allocate(nodes[i])
+    return infrastructure.measure_power
+
+
+def place(topology: str, size: int) -> Callable[[], object]:
+    """`Orchestrator.place()` and `Application.deallocate()` of a small application between random nodes."""
+    rng = np.random.default_rng(0)
+    infrastructure = TOPOLOGIES[topology](size, rng)
+    nodes = infrastructure.nodes()
+    orchestrator = RandomOrchestrator(infrastructure, rng)
+    applications = [application_dag(APPLICATION_SIZE, rng, nodes[i], nodes[j])
+                    for i, j in rng.integers(len(nodes), size=(16, 2))]
+    iteration = iter(range(2 ** 62))
+
+    def run():
+        application = applications[next(iteration) % len(applications)]
+        orchestrator.place(application)
+        application.deallocate()
+    return run
+
+
+def add_task(size: int) -> Callable[[], object]:
+    """Building an application DAG via `Application.add_task()`."""
+    node = Node("node")
+    return lambda: application_dag(size, np.random.default_rng(0), node, node)
+
+
+def power_meter(topology: str, size: int) -> Callable[[], object]:
+    """`PowerMeter.run()` measuring all nodes and links of an infrastructure for a fixed number of steps."""
+    rng = np.random.default_rng(0)
+    infrastructure = TOPOLOGIES[topology](size, rng)
+    entities = infrastructure.nodes() + infrastructure.links()
+
+    def run():
+        env = simpy.Environment()
+        env.process(PowerMeter(entities, name="benchmark").run(env))
+        env.run(until=METER_STEPS)
+    return run
+
+
+BENCHMARKS: Dict[str, Callable[..., Callable[[], object]]] = {
+    "infrastructure.measure_power": measure_power,
+    "orchestrator.place": place,
+    "application.add_task": add_task,
+    "power_meter.run": power_meter,
+}
+
+
+def cases(sizes: List[int], topologies: List[str]) -> List[Case]:
+    """Return all cases of all benchmarks for the given sizes and topologies."""
+    result = []
+    for size in sizes:
+        for topology in topologies:
+            for engine in ENGINES:
+                result.append(Case("infrastructure.measure_power", {"topology": topology, "size": size, "engine": engine}))
+            result.append(Case("orchestrator.place", {"topology": topology, "size": size}))
+            result.append(Case("power_meter.run", {"topology": topology, "size": size}))
+        result.append(Case("application.add_task", {"size": size}))
+    return result
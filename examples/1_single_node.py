@@ -3,7 +3,7 @@ import simpy
 
 from leaf.application import Task
 from leaf.infrastructure import Node
-from leaf.power import PowerModelNode, PowerMeasurement, PowerMeter
+from leaf.power import PowerModelNode, PowerMeasurement, PowerMeter, EnergyMeter
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG, format='%(levelname)s\t%(message)s')
@@ -26,20 +26,24 @@ def main():
         DEBUG	8: PowerMeter1: PowerMeasurement(dynamic=0.00W, static=10.00W)
         DEBUG	9: PowerMeter1: PowerMeasurement(dynamic=0.00W, static=10.00W)
         INFO	Total power usage: 200.0 Ws
+        INFO	Exact energy usage: 200.0 Ws
     """
     # Initializing infrastructure and workload
     node = Node("node1", cu=100, power_model=PowerModelNode(max_power=30, static_power=10))
     task = Task(cu=100)
 
+    env = simpy.Environment()  # creating SimPy simulation environment
+
     power_meter = PowerMeter(node, name="PowerMeter1")
+    energy_meter = EnergyMeter(node, env, name="EnergyMeter1")  # integrates power on every load change, no process
 
-    env = simpy.Environment()  # creating SimPy simulation environment
     env.process(placement(env, node, task))  # registering workload placement process
     env.process(power_meter.run(env))  # registering power metering process
 
     env.run(until=10)  # run simulation for 10 seconds
 
     logger.info(f"Total power usage: {float(PowerMeasurement.sum(power_meter.measurements))} Ws")
+    logger.info(f"Exact energy usage: {float(energy_meter.measure_energy())} Ws")
 
 
 def placement(env, node, task):
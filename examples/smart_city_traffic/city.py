@@ -1,11 +1,14 @@
-from typing import List, Tuple, Iterator
+import os
+import pickle
+from typing import List, Tuple, Dict, Sequence, Optional
 
 import networkx as nx
+import numpy as np
 import simpy
 
 from examples.smart_city_traffic.infrastructure import Cloud, FogNode, TrafficLight, LinkWanUp, LinkEthernet, \
     LinkWifiBetweenTrafficLights, LinkWanDown, LinkWifiTaxiToTrafficLight, Taxi
-from mobility import Location
+from leaf.mobility import Location, SpatialIndex, locations_at
 from examples.smart_city_traffic.orchestrator import CityOrchestrator
 from examples.smart_city_traffic.settings import *
 from leaf.infrastructure import Infrastructure
@@ -16,12 +19,17 @@ class City:
         self.env = env
         self.street_graph, self.entry_point_locations, self.traffic_light_locations = _create_street_graph()
         self.infrastructure = Infrastructure()
+        self.traffic_light_index = SpatialIndex(cell_size=WIFI_RANGE)
         self.orchestrator = CityOrchestrator(self.infrastructure, utilization_threshold=FOG_UTILIZATION_THRESHOLD)
 
         # Create infrastructure
         self.infrastructure.add_node(Cloud())
         for location in self.traffic_light_locations:
             self._add_traffic_light(location)
+        self._traffic_lights: List[TrafficLight] = list(self.infrastructure.nodes(type_filter=TrafficLight))
+        self._traffic_light_coordinates = np.array([(tl.location.x, tl.location.y) for tl in self._traffic_lights])
+        self._wifi_connections: Dict[Taxi, TrafficLight] = {}
+        self._routes: Optional[Dict[Tuple[int, int], Tuple[np.ndarray, Tuple[int, ...]]]] = None
         for location in RNG.choice(self.traffic_light_locations, FOG_DCS):
             self._add_fog_node(location)
 
@@ -29,20 +37,38 @@ class City:
         self.update_wifi_connections_process = self.env.process(self._update_wifi_connections())
 
         # Place CCTV applications
-        for traffic_light in self.infrastructure.nodes(type_filter=TrafficLight):
-            self.orchestrator.place(traffic_light.application)
+        self.orchestrator.place_many(tl.application for tl in self.infrastructure.nodes(type_filter=TrafficLight))
+
+    def route(self, start: int, dst: int) -> Tuple[np.ndarray, List[TrafficLight]]:
+        """Returns the waypoints of the shortest route between two entry points and the traffic lights on it.
+
+        Entry points are referred to by their index in `entry_point_locations`. The routes between all pairs of entry
+        points are computed on first use and cached on disk if `ROUTE_TABLE_CACHE_DIR` is set.
+        """
+        if self._routes is None:
+            self._routes = _load_or_create_routes(self.street_graph, self.entry_point_locations,
+                                                  self.traffic_light_locations)
+        waypoints, traffic_light_indices = self._routes[start, dst]
+        return waypoints, [self._traffic_lights[i] for i in traffic_light_indices]
 
     def add_taxi_and_start_v2i_app(self, taxi: Taxi):
         """Cars are connected to all traffic light systems in range via WiFi.
 
         Note: This initial allocation may change during simulation since taxis are mobile.
         """
-        self.infrastructure.add_link(LinkWifiTaxiToTrafficLight(taxi, self._closest_traffic_light(taxi)))
-        self.orchestrator.place(taxi.application)
+        self.add_taxis_and_start_v2i_apps([taxi])
+
+    def add_taxis_and_start_v2i_apps(self, taxis: List[Taxi]):
+        """Connects several taxis to their closest traffic light and places all their V2I applications at once."""
+        for taxi, traffic_light in zip(taxis, self._closest_traffic_lights(taxis)):
+            self.infrastructure.add_link(LinkWifiTaxiToTrafficLight(taxi, traffic_light))
+            self._wifi_connections[taxi] = traffic_light
+        self.orchestrator.place_many(taxi.application for taxi in taxis)
 
     def remove_taxi_and_stop_v2i_app(self, taxi: Taxi):
         taxi.application.deallocate()
         self.infrastructure.remove_node(taxi)
+        del self._wifi_connections[taxi]
 
     def _add_traffic_light(self, location: Location):
         """Traffic lights are connected to the cloud via WAN and to other traffic lights in range via WiFi."""
@@ -50,6 +76,7 @@ class City:
         traffic_light = TrafficLight(location, application_sink=cloud)
         self.infrastructure.add_link(LinkWanUp(traffic_light, cloud))
         self.infrastructure.add_link(LinkWanDown(cloud, traffic_light))
+        self.traffic_light_index.insert(traffic_light)
         for traffic_light_ in self._traffic_lights_in_range(traffic_light):
             self.infrastructure.add_link(LinkWifiBetweenTrafficLights(traffic_light, traffic_light_))
             self.infrastructure.add_link(LinkWifiBetweenTrafficLights(traffic_light_, traffic_light))
@@ -63,24 +90,66 @@ class City:
                 self.infrastructure.add_link(LinkEthernet(fog_node, traffic_light))
 
     def _update_wifi_connections(self):
-        """Recalculates the traffic lights in range for all taxis."""
-        g = self.infrastructure.graph
+        """Reconnects all taxis whose closest traffic light changed."""
         while True:
             yield self.env.timeout(UPDATE_WIFI_CONNECTIONS_INTERVAL)
-            for taxi in self.infrastructure.nodes(type_filter=Taxi):
-                tl_connected_name = next(g.neighbors(taxi.name))
-                tl_closest = self._closest_traffic_light(taxi)
-                if tl_connected_name != tl_closest.name:
-                    g.remove_edge(taxi.name, tl_connected_name)
+            taxis = self.infrastructure.nodes(type_filter=Taxi)
+            for taxi, tl_closest in zip(taxis, self._closest_traffic_lights(taxis)):
+                tl_connected = self._wifi_connections[taxi]
+                if tl_connected is not tl_closest:
+                    self.infrastructure.remove_link(self.infrastructure.link(taxi.name, tl_connected.name))
                     self.infrastructure.add_link(LinkWifiTaxiToTrafficLight(taxi, tl_closest))
-
-    def _traffic_lights_in_range(self, traffic_light: TrafficLight) -> Iterator[TrafficLight]:
-        for tl in self.infrastructure.nodes(type_filter=TrafficLight):
-            if traffic_light.location.distance(tl.location) <= WIFI_RANGE:
-                yield tl
-
-    def _closest_traffic_light(self, taxi: Taxi) -> TrafficLight:
-        return min(self.infrastructure.nodes(type_filter=TrafficLight), key=lambda tl: taxi.location.distance(tl.location))
+                    self._wifi_connections[taxi] = tl_closest
+
+    def _traffic_lights_in_range(self, traffic_light: TrafficLight) -> List[TrafficLight]:
+        return self.traffic_light_index.within(traffic_light.location, WIFI_RANGE)
+
+    def _closest_traffic_lights(self, taxis: Sequence[Taxi], chunk_size: int = 4096) -> List[TrafficLight]:
+        """Returns the closest traffic light of each taxi, computed for all taxis at once on their position matrix."""
+        positions = locations_at([taxi.mobility_model.trajectory for taxi in taxis], self.env.now)
+        closest = np.empty(len(positions), dtype=np.intp)
+        for start in range(0, len(positions), chunk_size):  # Bounds the size of the distance matrix
+            delta = positions[start:start + chunk_size, np.newaxis, :] - self._traffic_light_coordinates[np.newaxis]
+            closest[start:start + chunk_size] = np.argmin((delta * delta).sum(axis=2), axis=1)
+        return [self._traffic_lights[i] for i in closest]
+
+
+def _load_or_create_routes(street_graph: nx.Graph, entry_point_locations: List[Location],
+                           traffic_light_locations: List[Location]) -> Dict[Tuple[int, int], Tuple[np.ndarray, Tuple[int, ...]]]:
+    """Returns the shortest route between every pair of distinct entry points, using the on-disk cache if possible.
+
+    Every route consists of the coordinates of its waypoints and the indices of the traffic lights on it.
+    """
+    entry_points = np.array([(location.x, location.y) for location in entry_point_locations])
+    traffic_lights = np.array([(location.x, location.y) for location in traffic_light_locations])
+    cache_path = None
+    if ROUTE_TABLE_CACHE_DIR is not None:
+        cache_path = os.path.join(ROUTE_TABLE_CACHE_DIR, f"routes_{STREETS_PER_AXIS}_{BLOCK_SIZE_WIDTH}x{BLOCK_SIZE_HEIGHT}.pkl")
+        if os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                cached = pickle.load(f)
+            if np.array_equal(cached["entry_points"], entry_points) and \
+                    np.array_equal(cached["traffic_lights"], traffic_lights):
+                return cached["routes"]
+
+    routes = {}
+    for start, start_location in enumerate(entry_point_locations):
+        for dst, dst_location in enumerate(entry_point_locations):
+            if start == dst:
+                continue
+            path = nx.shortest_path(street_graph, source=start_location, target=dst_location)
+            waypoints = np.array([(location.x, location.y) for location in path])
+            path_locations = set(path)
+            traffic_light_indices = tuple(i for i, location in enumerate(traffic_light_locations)
+                                          if location in path_locations)
+            routes[start, dst] = (waypoints, traffic_light_indices)
+
+    if cache_path is not None:
+        os.makedirs(ROUTE_TABLE_CACHE_DIR, exist_ok=True)
+        with open(cache_path + ".tmp", "wb") as f:
+            pickle.dump({"entry_points": entry_points, "traffic_lights": traffic_lights, "routes": routes}, f)
+        os.replace(cache_path + ".tmp", cache_path)
+    return routes
 
 
 def _create_street_graph() -> Tuple[nx.Graph, List[Location], List[Location]]:
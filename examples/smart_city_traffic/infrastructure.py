@@ -1,8 +1,8 @@
-from typing import List
+from typing import List, Dict, Tuple
 
 import simpy
 
-from leaf.application import Application, SourceTask, ProcessingTask, SinkTask
+from leaf.application import Application, SourceTask, ProcessingTask, SinkTask, ApplicationBlueprint
 from examples.smart_city_traffic.settings import *
 from leaf.infrastructure import Link, Node
 from leaf.power import PowerModelLink, PowerModelNode, PowerMeasurement
@@ -12,6 +12,10 @@ _fog_nodes_created = 0
 _traffic_lights_created = 0
 _taxis_created = 0
 
+"""Blueprints of the CCTV and V2I applications, keyed by the settings they were built with (and the number of sinks)"""
+_cctv_blueprints: Dict[Tuple, ApplicationBlueprint] = {}
+_v2i_blueprints: Dict[Tuple, ApplicationBlueprint] = {}
+
 
 class Cloud(Node):
     def __init__(self):
@@ -53,14 +57,19 @@ class TrafficLight(Node):
         self.application = self._create_cctv_application(application_sink)
 
     def _create_cctv_application(self, application_sink: Node):
-        application = Application()
-        source_task = SourceTask(cu=0, bound_node=self)
-        application.add_task(source_task)
-        processing_task = ProcessingTask(cu=CCTV_PROCESSOR_CU)
-        application.add_task(processing_task, incoming_data_flows=[(source_task, CCTV_SOURCE_TO_PROCESSOR_BIT_RATE)])
-        sink_task = SinkTask(cu=0, bound_node=application_sink)
-        application.add_task(sink_task, incoming_data_flows=[(processing_task, CCTV_PROCESSOR_TO_SINK_BIT_RATE)])
-        return application
+        key = (CCTV_PROCESSOR_CU, CCTV_SOURCE_TO_PROCESSOR_BIT_RATE, CCTV_PROCESSOR_TO_SINK_BIT_RATE)
+        blueprint = _cctv_blueprints.get(key)
+        if blueprint is None:
+            application = Application()
+            source_task = SourceTask(cu=0, bound_node=self)
+            application.add_task(source_task)
+            processing_task = ProcessingTask(cu=CCTV_PROCESSOR_CU)
+            application.add_task(processing_task, incoming_data_flows=[(source_task, CCTV_SOURCE_TO_PROCESSOR_BIT_RATE)])
+            sink_task = SinkTask(cu=0, bound_node=application_sink)
+            application.add_task(sink_task, incoming_data_flows=[(processing_task, CCTV_PROCESSOR_TO_SINK_BIT_RATE)])
+            blueprint = ApplicationBlueprint(application)
+            _cctv_blueprints[key] = blueprint
+        return blueprint.instantiate(bound_nodes={0: self, 2: application_sink})
 
 
 class Taxi(Node):
@@ -81,18 +90,28 @@ class Taxi(Node):
         pass  # only for initialization, locations of this node is managed by the TaxiMobilityModel
 
     def _create_v2i_application(self, application_sinks: List[Node]) -> Application:
-        application = Application()
-        source_task = SourceTask(cu=0, bound_node=self)
-        application.add_task(source_task)
-        processing_task = ProcessingTask(cu=V2I_PROCESSOR_CU)
-        application.add_task(processing_task, incoming_data_flows=[(source_task, V2I_SOURCE_TO_PROCESSOR_BIT_RATE)])
-        for application_sink in application_sinks:
-            sink_task = SinkTask(cu=0, bound_node=application_sink)
-            application.add_task(sink_task, incoming_data_flows=[(processing_task, V2I_PROCESSOR_TO_SINK_BIT_RATE)])
-        return application
+        key = (len(application_sinks), V2I_PROCESSOR_CU, V2I_SOURCE_TO_PROCESSOR_BIT_RATE,
+               V2I_PROCESSOR_TO_SINK_BIT_RATE)
+        blueprint = _v2i_blueprints.get(key)
+        if blueprint is None:
+            application = Application()
+            source_task = SourceTask(cu=0, bound_node=self)
+            application.add_task(source_task)
+            processing_task = ProcessingTask(cu=V2I_PROCESSOR_CU)
+            application.add_task(processing_task, incoming_data_flows=[(source_task, V2I_SOURCE_TO_PROCESSOR_BIT_RATE)])
+            for application_sink in application_sinks:
+                sink_task = SinkTask(cu=0, bound_node=application_sink)
+                application.add_task(sink_task, incoming_data_flows=[(processing_task, V2I_PROCESSOR_TO_SINK_BIT_RATE)])
+            blueprint = ApplicationBlueprint(application)
+            _v2i_blueprints[key] = blueprint
+        bound_nodes = {0: self}
+        bound_nodes.update((2 + i, application_sink) for i, application_sink in enumerate(application_sinks))
+        return blueprint.instantiate(bound_nodes)
 
 
 class LinkEthernet(Link):
+    __slots__ = ()
+
     def __init__(self, src: Node, dst: Node):
         super().__init__(src, dst,
                          bandwidth=ETHERNET_BANDWIDTH,
@@ -101,6 +120,8 @@ class LinkEthernet(Link):
 
 
 class LinkWanUp(Link):
+    __slots__ = ()
+
     def __init__(self, src: Node, dst: Node):
         super().__init__(src, dst,
                          bandwidth=WAN_BANDWIDTH,
@@ -109,6 +130,8 @@ class LinkWanUp(Link):
 
 
 class LinkWanDown(Link):
+    __slots__ = ()
+
     def __init__(self, src: Node, dst: Node):
         super().__init__(src, dst,
                          bandwidth=WAN_BANDWIDTH,
@@ -117,6 +140,8 @@ class LinkWanDown(Link):
 
 
 class LinkWifiBetweenTrafficLights(Link):
+    __slots__ = ()
+
     def __init__(self, src: Node, dst: Node):
         super().__init__(src, dst,
                          bandwidth=WIFI_BANDWIDTH,
@@ -125,6 +150,8 @@ class LinkWifiBetweenTrafficLights(Link):
 
 
 class LinkWifiTaxiToTrafficLight(Link):
+    __slots__ = ()
+
     def __init__(self, src: Node, dst: Node):
         super().__init__(src, dst,
                          bandwidth=WIFI_BANDWIDTH,
@@ -1,6 +1,9 @@
 import logging
+from functools import partial
 from os import makedirs
+from typing import Dict
 
+import pandas as pd
 import simpy
 from tqdm import tqdm
 
@@ -11,16 +14,23 @@ from examples.smart_city_traffic.mobility import MobilityManager
 from examples.smart_city_traffic.settings import SIMULATION_TIME, FOG_DCS, POWER_MEASUREMENT_INTERVAL, \
     FOG_IDLE_SHUTDOWN
 from leaf.infrastructure import Infrastructure
-from leaf.power import PowerMeter
+from leaf.power import PowerMeter, PowerAggregate, MeterGroup
+from leaf.profiling import Profiler
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.WARN, format='%(levelname)s: %(message)s')
 
 
-def main(count_taxis: bool, measure_infrastructure: bool, measure_applications: bool):
+def main(count_taxis: bool, measure_infrastructure: bool, measure_applications: bool, profile: bool = False):
     # ----------------- Set up experiment -----------------
     env = simpy.Environment()
+    if profile:
+        # Records the wall time spent in all processes and the orchestrator per 10 minutes of simulated time
+        profiler = Profiler(env, window=600)
+        profiler.attach()
     city = City(env)
+    if profile:
+        profiler.instrument(city.orchestrator, "place", "place_many")
     mobility_manager = MobilityManager(city)
     env.process(mobility_manager.run(env))
 
@@ -28,25 +38,19 @@ def main(count_taxis: bool, measure_infrastructure: bool, measure_applications:
     if count_taxis:
         # Measures the amount of taxis on the map
         taxi_counter = TaxiCounter(env, city.infrastructure)
+    meters = []
     if measure_infrastructure:
         # Measures the power usage of cloud and fog nodes as well as WAN and WiFi links
-        pm_cloud = PowerMeter(entities=city.infrastructure.nodes(type_filter=Cloud), name="cloud", measurement_interval=POWER_MEASUREMENT_INTERVAL)
-        pm_fog = PowerMeter(entities=city.infrastructure.nodes(type_filter=FogNode), name="fog", measurement_interval=POWER_MEASUREMENT_INTERVAL)
-        pm_wan_up = PowerMeter(entities=city.infrastructure.links(type_filter=LinkWanUp), name="wan_up", measurement_interval=POWER_MEASUREMENT_INTERVAL)
-        pm_wan_down = PowerMeter(entities=city.infrastructure.links(type_filter=LinkWanDown), name="wan_down", measurement_interval=POWER_MEASUREMENT_INTERVAL)
-        pm_wifi = PowerMeter(entities=lambda: city.infrastructure.links(type_filter=(LinkWifiBetweenTrafficLights, LinkWifiTaxiToTrafficLight)), name="wifi", measurement_interval=POWER_MEASUREMENT_INTERVAL)
-
-        env.process(pm_cloud.run(env))
-        env.process(pm_fog.run(env))
-        env.process(pm_wan_up.run(env))
-        env.process(pm_wan_down.run(env))
-        env.process(pm_wifi.run(env))
+        infrastructure_meters = infrastructure_power_meters(city)
+        meters += infrastructure_meters.values()
     if measure_applications:
         # Measures the power usage of the V2I and CCTV applications
         pm_v2i = PowerMeter(entities=lambda: [taxi.application for taxi in city.infrastructure.nodes(type_filter=Taxi)], name="v2i", measurement_interval=POWER_MEASUREMENT_INTERVAL)
         pm_cctv = PowerMeter(entities=lambda: [tl.application for tl in city.infrastructure.nodes(type_filter=TrafficLight)], name="cctv", measurement_interval=POWER_MEASUREMENT_INTERVAL)
-        env.process(pm_v2i.run(env))
-        env.process(pm_cctv.run(env))
+        meters += [pm_v2i, pm_cctv]
+    if meters:
+        # A single process conducts the measurements of all power meters in one pass per time step
+        env.process(MeterGroup(meters).run(env))
 
     # ------------------ Run experiment -------------------
     for until in tqdm(range(1, SIMULATION_TIME)):
@@ -64,18 +68,39 @@ def main(count_taxis: bool, measure_infrastructure: bool, measure_applications:
         with open(f"{result_dir}/taxis.csv", 'w') as csvfile:
             csvfile.write(csv_content)
     if measure_infrastructure:
-        csv_content = "time,cloud static,cloud dynamic,fog static,fog dynamic,wifi static,wifi dynamic,wanUp static," \
-                      "wanUp dynamic,wanDown static,wanDown dynamic\n"
-        for i, (cloud, fog, wifi, wan_up, wan_down) in enumerate(zip(pm_cloud.measurements, pm_fog.measurements, pm_wifi.measurements, pm_wan_up.measurements, pm_wan_down.measurements)):
-            csv_content += f"{i},{cloud.static},{cloud.dynamic},{fog.static},{fog.dynamic},{wifi.static},{wifi.dynamic},{wan_up.static},{wan_up.dynamic},{wan_down.static},{wan_down.dynamic}\n"
-        with open(f"{result_dir}/infrastructure.csv", 'w') as csvfile:
-            csvfile.write(csv_content)
+        _write_csv(f"{result_dir}/infrastructure.csv", infrastructure_meters)
     if measure_applications:
-        csv_content = "time,v2i static,v2i dynamic,cctv static,cctv dynamic\n"
-        for i, (v2i, cctv) in enumerate(zip(pm_v2i.measurements, pm_cctv.measurements)):
-            csv_content += f"{i},{v2i.static},{v2i.dynamic},{cctv.static},{cctv.dynamic}\n"
-        with open(f"{result_dir}/applications.csv", 'w') as csvfile:
-            csvfile.write(csv_content)
+        _write_csv(f"{result_dir}/applications.csv", {"v2i": pm_v2i, "cctv": pm_cctv})
+    if profile:
+        profiler.detach()
+        profiler.to_dataframe().to_csv(f"{result_dir}/profile.csv", index=False)
+        profiler.write_collapsed(f"{result_dir}/profile.collapsed")
+
+
+def infrastructure_power_meters(city: City) -> Dict[str, PowerMeter]:
+    """Creates power meters for cloud and fog nodes as well as WAN and WiFi links, keyed by their result column name.
+
+    The set of cloud, fog, and WAN entities does not change during the simulation, so their power is maintained
+    incrementally. Fog nodes are idle or shut down most of the time, so their measurements are run-length encoded.
+    """
+    infrastructure = city.infrastructure
+    wifi_links = (LinkWifiBetweenTrafficLights, LinkWifiTaxiToTrafficLight)
+    return {
+        "cloud": PowerMeter(entities=PowerAggregate(infrastructure.nodes(type_filter=Cloud)), name="cloud", measurement_interval=POWER_MEASUREMENT_INTERVAL),
+        "fog": PowerMeter(entities=PowerAggregate(infrastructure.nodes(type_filter=FogNode)), name="fog", measurement_interval=POWER_MEASUREMENT_INTERVAL, compress=True),
+        "wifi": PowerMeter(entities=partial(infrastructure.links, type_filter=wifi_links), name="wifi", measurement_interval=POWER_MEASUREMENT_INTERVAL),
+        "wanUp": PowerMeter(entities=PowerAggregate(infrastructure.links(type_filter=LinkWanUp)), name="wan_up", measurement_interval=POWER_MEASUREMENT_INTERVAL),
+        "wanDown": PowerMeter(entities=PowerAggregate(infrastructure.links(type_filter=LinkWanDown)), name="wan_down", measurement_interval=POWER_MEASUREMENT_INTERVAL),
+    }
+
+
+def _write_csv(path: str, power_meters: Dict[str, PowerMeter]):
+    """Writes the static and dynamic power of several power meters as columns of a single CSV file."""
+    columns = {}
+    for name, power_meter in power_meters.items():
+        columns[f"{name} static"] = power_meter.measurements.static
+        columns[f"{name} dynamic"] = power_meter.measurements.dynamic
+    pd.DataFrame(columns).to_csv(path, index_label="time")
 
 
 class TaxiCounter:
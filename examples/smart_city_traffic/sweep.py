@@ -0,0 +1,90 @@
+import logging
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import simpy
+
+from examples.smart_city_traffic import city, infrastructure, main, mobility, orchestrator, settings
+from examples.smart_city_traffic.city import City
+from examples.smart_city_traffic.main import infrastructure_power_meters
+from examples.smart_city_traffic.mobility import MobilityManager
+from examples.smart_city_traffic.settings import SIMULATION_TIME
+from leaf.experiments import run_sweep
+from leaf.power import PowerMeter, MeterGroup
+from leaf.snapshot import fork
+
+logger = logging.getLogger(__name__)
+
+# All modules of the scenario which import settings by name, so that overrides have to be applied to each of them
+_SCENARIO_MODULES = (settings, city, infrastructure, main, mobility, orchestrator)
+
+# The fog configurations evaluated in the paper
+PAPER_CONFIGURATIONS = [
+    {"fog_dcs": list(range(7)), "fog_idle_shutdown": [False]},
+    {"fog_dcs": [6], "fog_idle_shutdown": [True]},
+]
+
+
+def city_scenario(rng: np.random.Generator, fog_dcs: int, fog_idle_shutdown: bool,
+                  simulation_time: int = SIMULATION_TIME) -> Dict[str, PowerMeter]:
+    """Runs the smart city scenario with the given fog configuration and returns its infrastructure power meters."""
+    configure(RNG=rng, FOG_DCS=fog_dcs, FOG_IDLE_SHUTDOWN=fog_idle_shutdown)
+    env = simpy.Environment()
+    smart_city = City(env)
+    mobility_manager = MobilityManager(smart_city)
+    env.process(mobility_manager.run(env))
+    power_meters = infrastructure_power_meters(smart_city)
+    env.process(MeterGroup(power_meters.values()).run(env))
+    env.run(until=simulation_time)
+    return power_meters
+
+
+def warm_started_replications(replications: int, warmup_time: int, seed: int = 0,
+                              simulation_time: int = SIMULATION_TIME) -> pd.DataFrame:
+    """Runs replications of the default scenario which share a common warm-up phase.
+
+    The warm-up is simulated once. Afterwards, the simulation is forked into one child process per replication,
+    each of which continues with its own random number generator.
+    """
+    env = simpy.Environment()
+    smart_city = City(env)
+    mobility_manager = MobilityManager(smart_city)
+    env.process(mobility_manager.run(env))
+    power_meters = infrastructure_power_meters(smart_city)
+    env.process(MeterGroup(power_meters.values()).run(env))
+    env.run(until=warmup_time)
+
+    def replicate(seed_sequence: np.random.SeedSequence) -> pd.DataFrame:
+        configure(RNG=np.random.default_rng(seed_sequence))
+        env.run(until=simulation_time)
+        return pd.concat({name: pm.measurements.to_dataframe() for name, pm in power_meters.items()},
+                         names=["series", None]).reset_index(level="series")
+
+    frames = fork(np.random.SeedSequence(seed).spawn(replications), replicate)
+    return pd.concat(frames, keys=range(replications), names=["replication", None]).reset_index(level="replication")
+
+
+def configure(**overrides):
+    """Overrides settings in all modules of the scenario, as they import the settings by name.
+
+    If `STREETS_PER_AXIS` is overridden, the city size is derived from it unless it is overridden as well.
+    A ValueError is raised for names which are not settings of the scenario, so that typos do not go unnoticed.
+    """
+    unknown = [name for name in overrides if not hasattr(settings, name)]
+    if unknown:
+        raise ValueError(f"Unknown settings: {', '.join(unknown)}")
+    if "STREETS_PER_AXIS" in overrides:
+        streets = overrides["STREETS_PER_AXIS"]
+        overrides.setdefault("CITY_WIDTH", (streets + 1) * overrides.get("BLOCK_SIZE_WIDTH", settings.BLOCK_SIZE_WIDTH))
+        overrides.setdefault("CITY_HEIGHT", (streets + 1) * overrides.get("BLOCK_SIZE_HEIGHT", settings.BLOCK_SIZE_HEIGHT))
+    for module in _SCENARIO_MODULES:
+        for name, value in overrides.items():
+            if hasattr(module, name):
+                setattr(module, name, value)
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.INFO)  # Importing main.py already configured logging with level WARN
+    results = run_sweep(city_scenario, PAPER_CONFIGURATIONS)
+    results.to_csv("results/sweep.csv", index=False)
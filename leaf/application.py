@@ -1,13 +1,32 @@
 from abc import ABC
-from typing import List, Tuple, Type, Optional, TypeVar, Union
+from typing import List, Tuple, Type, Optional, TypeVar, Union, Dict, Sequence, Any, Iterable
 
 import networkx as nx
 
 from leaf.infrastructure import Node, Link
 from leaf.power import PowerAware, PowerMeasurement
 
+def _notify_allocation(entities: Iterable[Union[Node, Link]], event: str, subject: Any, value: Any):
+    """Call the allocation listeners of the nodes or links on which a task or data flows were (de)allocated.
+
+    Listeners are called with (event, task or data flows, node or links) once per (de)allocation, even if they are
+    registered on several links of the path.
+    """
+    for listener in dict.fromkeys(listener for entity in entities for listener in entity._allocation_listeners):
+        listener(event, subject, value)
+
+
+def _path_entities(data_flows: Sequence["DataFlow"], links: Sequence[Link]) -> Sequence[Union[Node, Link]]:
+    if links:
+        return links
+    # Data flows between tasks on the same node have an empty path, so the nodes of their applications are notified
+    return [task.node for data_flow in data_flows if data_flow._application is not None
+            for task in data_flow._application.tasks() if task.node is not None]
+
 
 class Task(PowerAware):
+    __slots__ = ("id", "cu", "node", "_application")
+
     def __init__(self, cu: float):
         """Task that can be placed on a :class:`Node`.
 
@@ -22,23 +41,34 @@ class Task(PowerAware):
         self.id: Optional[int] = None
         self.cu = cu
         self.node: Optional[Node] = None
+        self._application: Optional["Application"] = None
 
     def __repr__(self):
         return f"{self.__class__.__name__}(id={self.id}, cu={self.cu})"
 
     def allocate(self, node: Node):
-        """Place the task on a certain node and allocate resources."""
+        """Place the task on a certain node and allocate resources.
+
+        If the node does not have enough free compute units, a ValueError is raised and the task remains unplaced.
+        """
         if self.node is not None:
             raise ValueError(f"Cannot place {self} on {node}: It was already placed on {self.node}.")
+        node._add_task(self)
         self.node = node
-        self.node._add_task(self)
+        if self._application is not None:
+            self._application._plan = None
+        _notify_allocation([node], "allocate_task", self, node)
 
     def deallocate(self):
         """Detache the task from the node it is currently placed on and deallocate resources."""
         if self.node is None:
             raise ValueError(f"{self} is not placed on any node.")
-        self.node._remove_task(self)
+        node = self.node
+        node._remove_task(self)
         self.node = None
+        if self._application is not None:
+            self._application._plan = None
+        _notify_allocation([node], "deallocate_task", self, node)
 
     def measure_power(self) -> PowerMeasurement:
         try:
@@ -48,6 +78,8 @@ class Task(PowerAware):
 
 
 class SourceTask(Task):
+    __slots__ = ("bound_node",)
+
     def __init__(self, cu: float = 0, bound_node: Node = None):
         """Source task of an application that is bound to a certain node, e.g. a sensor generating data.
 
@@ -64,6 +96,8 @@ class SourceTask(Task):
 
 
 class ProcessingTask(Task):
+    __slots__ = ()
+
     def __init__(self, cu: float = 0):
         """Processing task of an application that can be freely placed on the infrastructure.
 
@@ -76,6 +110,8 @@ class ProcessingTask(Task):
 
 
 class SinkTask(Task):
+    __slots__ = ("bound_node",)
+
     def __init__(self, cu: float = 0, bound_node: Node = None):
         """Sink task of an application that is bound to a certain node, e.g. a cloud server for storage.
 
@@ -90,6 +126,8 @@ class SinkTask(Task):
 
 
 class DataFlow(PowerAware):
+    __slots__ = ("bit_rate", "links", "_application")
+
     def __init__(self, bit_rate: float):
         """Data flow between two tasks of an application.
 
@@ -98,25 +136,52 @@ class DataFlow(PowerAware):
         """
         self.bit_rate = bit_rate
         self.links: Optional[List[Link]] = None
+        self._application: Optional["Application"] = None
 
     def __repr__(self):
         return f"{self.__class__.__name__}(bit_rate={self.bit_rate})"
 
     def allocate(self, links: List[Link]):
-        """Place the data flow on a path of links and allocate bandwidth."""
-        if self.links is not None:
-            raise ValueError(f"Cannot place {self} on {links}: It was already placed on path {self.links}.")
-        self.links = links
-        for link in self.links:
-            link._add_data_flow(self)
+        """Place the data flow on a path of links and allocate bandwidth.
+
+        If any link on the path does not have enough free bandwidth, a ValueError is raised and the bandwidth already
+        reserved on the preceding links is released again, so the data flow remains unplaced.
+        """
+        DataFlow.allocate_many([self], links)
+
+    @staticmethod
+    def allocate_many(data_flows: List["DataFlow"], links: List[Link]):
+        """Place several data flows on the same path of links, reserving their bandwidth at once per link.
+
+        Like :meth:`allocate`, this either places all data flows or none of them.
+        """
+        for data_flow in data_flows:
+            if data_flow.links is not None:
+                raise ValueError(f"Cannot place {data_flow} on {links}: It was already placed on path {data_flow.links}.")
+        for i, link in enumerate(links):
+            try:
+                link._add_data_flows(data_flows)
+            except ValueError:
+                for allocated_link in reversed(links[:i]):
+                    allocated_link._remove_data_flows(data_flows)
+                raise
+        for data_flow in data_flows:
+            data_flow.links = links
+            if data_flow._application is not None:
+                data_flow._application._plan = None
+        _notify_allocation(_path_entities(data_flows, links), "allocate_data_flows", data_flows, links)
 
     def deallocate(self):
         """Remove the data flow from the infrastructure and deallocate bandwidth."""
         if self.links is None:
             raise ValueError(f"{self} is not placed on any link.")
-        for link in self.links:
+        links = self.links
+        for link in links:
             link._remove_data_flow(self)
         self.links = None
+        if self._application is not None:
+            self._application._plan = None
+        _notify_allocation(_path_entities([self], links), "deallocate_data_flow", self, links)
 
     def measure_power(self) -> PowerMeasurement:
         if self.links is None:
@@ -126,17 +191,42 @@ class DataFlow(PowerAware):
 
 
 class Application(PowerAware):
-    """Application consisting of one or more tasks forming a directed acyclic graph (DAG)."""
+    """Application consisting of one or more tasks forming a directed acyclic graph (DAG).
+
+    Tasks can only receive data flows from tasks of the same application that were added before them, so the
+    application is a DAG by construction.
+    """
     _TTask = TypeVar("TTask", bound=Task)  # Generics
     _TDataFlow = TypeVar("TDataFlow", bound=DataFlow)  # Generics
     _TaskTypeFilter = Union[Type[_TTask], Tuple[Type[_TTask], ...]]
     _DataFlowTypeFilter = Union[Type[_TDataFlow], Tuple[Type[_TDataFlow], ...]]
 
     def __init__(self):
-        self.graph = nx.DiGraph()
+        self._tasks: List[Task] = []
+        self._data_flows: List[DataFlow] = []
+        self._edges: Sequence[Tuple[int, int]] = []  # (src task id, dst task id) of every data flow
+        self._graph: Optional[nx.DiGraph] = None
+        self._plan: Optional[_MeasurementPlan] = None
 
     def __repr__(self):
-        return f"{self.__class__.__name__}(tasks={len(self.tasks())})"
+        return f"{self.__class__.__name__}(tasks={len(self._tasks)})"
+
+    @property
+    def graph(self) -> nx.DiGraph:
+        """The application as a networkx graph with the task ids as nodes.
+
+        Every node has the :class:`Task` and every edge the :class:`DataFlow` as `data` attribute. The graph is built
+        on first access and afterwards kept up to date by :meth:`add_task`. It is derived from the tasks and data flows
+        of the application, so changes made to the graph directly are not reflected in :meth:`tasks`,
+        :meth:`data_flows` or the power measurement; use :meth:`add_task` to extend the application.
+        """
+        if self._graph is None:
+            self._graph = nx.DiGraph()
+            for task in self._tasks:
+                self._graph.add_node(task.id, data=task)
+            for (src_id, dst_id), data_flow in zip(self._edges, self._data_flows):
+                self._graph.add_edge(src_id, dst_id, data=data_flow)
+        return self._graph
 
     def add_task(self, task: Task, incoming_data_flows: List[Tuple[Task, float]] = None):
         """Add a task to the application graph.
@@ -146,47 +236,182 @@ class Application(PowerAware):
             incoming_data_flows: List of tuples (`src_task`, `bit_rate`) where every `src_task` is the source of a
                 :class:`DataFlow` with a certain `bit_rate` to the added `task`
         """
-        task.id = len(self.tasks())
         if isinstance(task, SourceTask):
             assert not incoming_data_flows, f"Source task '{task}' cannot have incoming_data_flows"
-            self.graph.add_node(task.id, data=task)
-        elif isinstance(task, ProcessingTask):
-            assert len(incoming_data_flows) > 0, f"Processing task '{task}' has no incoming_data_flows"
-            self.graph.add_node(task.id, data=task)
-            for src_task, bit_rate in incoming_data_flows:
-                assert not isinstance(src_task, SinkTask), f"Sink task '{task}' cannot have outgoing data flows"
-                self.graph.add_edge(src_task.id, task.id, data=DataFlow(bit_rate))
-        elif isinstance(task, SinkTask):
-            assert len(incoming_data_flows) > 0, f"Sink task '{task}' has no incoming_data_flows"
-            self.graph.add_node(task.id, data=task)
-            for src_task, bit_rate in incoming_data_flows:
-                assert not isinstance(src_task, SinkTask), f"Sink task '{task}' cannot have outgoing data flows"
-                self.graph.add_edge(src_task.id, task.id, data=DataFlow(bit_rate))
-            assert nx.is_directed_acyclic_graph(self.graph), f"Application '{self}' is no DAG"
+        elif isinstance(task, (ProcessingTask, SinkTask)):
+            assert incoming_data_flows, f"{task.__class__.__name__} '{task}' has no incoming_data_flows"
+            for src_task, _ in incoming_data_flows:
+                if src_task._application is not self:
+                    raise ValueError(f"Source task '{src_task}' is not part of application '{self}'")
+                assert not isinstance(src_task, SinkTask), f"Sink task '{src_task}' cannot have outgoing data flows"
         else:
             raise ValueError(f"Unknown task type '{type(task)}'")
+        if task._application is self:
+            raise ValueError(f"Task '{task}' is already part of application '{self}'")
+        task.id = len(self._tasks)
+        task._application = self
+        self._tasks.append(task)
+        if self._graph is not None:
+            self._graph.add_node(task.id, data=task)
+        if incoming_data_flows:
+            if not isinstance(self._edges, list):  # Edges shared with an ApplicationBlueprint
+                self._edges = list(self._edges)
+            for src_task, bit_rate in incoming_data_flows:
+                data_flow = self._create_data_flow(bit_rate)
+                self._edges.append((src_task.id, task.id))
+                self._data_flows.append(data_flow)
+                if self._graph is not None:
+                    self._graph.add_edge(src_task.id, task.id, data=data_flow)
+        self._plan = None
 
     def tasks(self, type_filter: Optional[_TaskTypeFilter] = None) -> List[_TTask]:
         """Return all tasks in the application, optionally filtered by class."""
-        task_iter = (task for _, task in self.graph.nodes.data("data"))
         if type_filter:
-            task_iter = (task for task in task_iter if isinstance(task, type_filter))
-        return list(task_iter)
+            return [task for task in self._tasks if isinstance(task, type_filter)]
+        return list(self._tasks)
 
     def data_flows(self, type_filter: Optional[_DataFlowTypeFilter] = None) -> List[_TDataFlow]:
         """Return all data flows in the application, optionally filtered by class."""
-        df_iter = [v for _, _, v in self.graph.edges.data("data")]
         if type_filter:
-            df_iter = (df for df in df_iter if isinstance(df, type_filter))
-        return list(df_iter)
+            return [data_flow for data_flow in self._data_flows if isinstance(data_flow, type_filter)]
+        return list(self._data_flows)
+
+    def edges(self) -> List[Tuple[Task, Task, DataFlow]]:
+        """Return all data flows in the application together with their source and target task."""
+        return [(self._tasks[src_id], self._tasks[dst_id], data_flow)
+                for (src_id, dst_id), data_flow in zip(self._edges, self._data_flows)]
 
     def deallocate(self):
         """Detach/Unmap/Release an application from the infrastructure it is currently placed on."""
-        for task in self.tasks():
-            task.deallocate()
+        # Data flows first, so data flows between tasks on the same node are still reported to that node's listeners
         for data_flow in self.data_flows():
             data_flow.deallocate()
+        for task in self.tasks():
+            task.deallocate()
 
     def measure_power(self) -> PowerMeasurement:
-        measurements = [t.measure_power() for t in self.tasks()] + [df.measure_power() for df in self.data_flows()]
-        return PowerMeasurement.sum(measurements)
+        """Return the power used by the application's tasks and data flows.
+
+        The shares of nodes and links used by the application are compiled into a :class:`_MeasurementPlan` on the
+        first measurement after each (de)allocation, so every node and link is only measured once per call.
+        """
+        if self._plan is None:
+            self._plan = _MeasurementPlan(self)
+        return self._plan.measure()
+
+    def _create_data_flow(self, bit_rate: float) -> DataFlow:
+        data_flow = DataFlow(bit_rate)
+        data_flow._application = self
+        return data_flow
+
+
+class ApplicationBlueprint:
+    def __init__(self, application: Application):
+        """Template for creating many applications with the same structure, e.g. one per vehicle or sensor.
+
+        The blueprint takes a snapshot of the tasks and data flows of an already built (and therefore validated)
+        application. :meth:`instantiate` then creates new applications by copying the tasks and data flows, without
+        running the validation of :meth:`Application.add_task` again. The data flow structure is shared between all
+        instances; the networkx :attr:`Application.graph` of an instance is only built if it is accessed.
+
+        Example:
+            ::
+
+                blueprint = ApplicationBlueprint(application)
+                for sensor in sensors:
+                    sensor.application = blueprint.instantiate(bound_nodes={0: sensor})
+
+        Args:
+            application: Application whose structure is used as template. Changes made to it afterwards do not affect
+                the blueprint.
+        """
+        self._tasks = tuple(_attributes(task, exclude=("node", "_application")) for task in application._tasks)
+        self._data_flows = tuple(_attributes(data_flow, exclude=("links", "_application"))
+                                 for data_flow in application._data_flows)
+        self._edges = tuple(application._edges)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(tasks={len(self._tasks)}, data_flows={len(self._data_flows)})"
+
+    def instantiate(self, bound_nodes: Optional[Dict[int, Node]] = None) -> Application:
+        """Create a new, unplaced application from the blueprint.
+
+        Args:
+            bound_nodes: Mapping from ids of :class:`SourceTask` or :class:`SinkTask` to the nodes that the tasks of
+                the new application are bound to. Tasks not contained in the mapping are bound to the same node as in
+                the template.
+        """
+        application = Application()
+        for cls, attributes in self._tasks:
+            task = cls.__new__(cls)
+            for name, value in attributes:
+                setattr(task, name, value)
+            task.node = None
+            task._application = application
+            application._tasks.append(task)
+        if bound_nodes:
+            for task_id, node in bound_nodes.items():
+                task = application._tasks[task_id]
+                if not isinstance(task, (SourceTask, SinkTask)):
+                    raise ValueError(f"Cannot bind {task} to {node}: Only source and sink tasks are bound to nodes.")
+                task.bound_node = node
+        for cls, attributes in self._data_flows:
+            data_flow = cls.__new__(cls)
+            for name, value in attributes:
+                setattr(data_flow, name, value)
+            data_flow.links = None
+            data_flow._application = application
+            application._data_flows.append(data_flow)
+        application._edges = self._edges
+        return application
+
+
+def _attributes(entity: Union[Task, DataFlow], exclude: Tuple[str, ...]) -> Tuple[type, Tuple[Tuple[str, Any], ...]]:
+    """Return the class of a task or data flow and its attributes (both slots and `__dict__`) as (name, value) pairs."""
+    attributes = {}
+    for cls in reversed(type(entity).__mro__):
+        slots = cls.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ("__dict__", "__weakref__") and hasattr(entity, name):
+                attributes[name] = getattr(entity, name)
+    attributes.update(getattr(entity, "__dict__", {}))
+    return type(entity), tuple((name, value) for name, value in attributes.items() if name not in exclude)
+
+
+class _MeasurementPlan:
+    def __init__(self, application: Application):
+        """Flat representation of the nodes and links an application is placed on.
+
+        For every node, the plan stores the compute units of all tasks of the application placed on it, and for every
+        link the summed bit rate of all data flows of the application routed over it. The power share of the
+        application is then `power * cu / used_cu` per node and `power * bit_rate / used_bandwidth` per link.
+        """
+        cu_by_node: Dict[Node, float] = {}
+        for task in application.tasks():
+            if task.node is None:
+                raise RuntimeError(f"Cannot measure power: {task} of {application} was not placed on any node.")
+            cu_by_node[task.node] = cu_by_node.get(task.node, 0) + task.cu
+        bit_rate_by_link: Dict[Link, float] = {}
+        for data_flow in application.data_flows():
+            if data_flow.links is None:
+                raise RuntimeError(f"Cannot measure power: {data_flow} of {application} was not placed on any links.")
+            for link in data_flow.links:
+                bit_rate_by_link[link] = bit_rate_by_link.get(link, 0) + data_flow.bit_rate
+        self.nodes: List[Tuple[Node, float]] = list(cu_by_node.items())
+        self.links: List[Tuple[Link, float]] = list(bit_rate_by_link.items())
+
+    def measure(self) -> PowerMeasurement:
+        dynamic = static = 0
+        for node, cu in self.nodes:
+            if node.used_cu:
+                measurement = node.measure_power()
+                share = cu / node.used_cu
+                dynamic += measurement.dynamic * share
+                static += measurement.static * share
+        for link, bit_rate in self.links:
+            if link.used_bandwidth:
+                measurement = link.measure_power()
+                share = bit_rate / link.used_bandwidth
+                dynamic += measurement.dynamic * share
+                static += measurement.static * share
+        return PowerMeasurement(dynamic, static)
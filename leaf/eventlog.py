@@ -0,0 +1,304 @@
+import array
+from typing import Any, Callable, Collection, Dict, Iterator, List, Mapping, Optional, Set, Tuple, Union
+
+import simpy
+
+from leaf.application import Application, DataFlow, Task
+from leaf.infrastructure import Infrastructure, Link, Node, TypeIndex
+from leaf.power import PowerAggregate, PowerAware, PowerMeasurement, PowerSeries
+
+_ADD, _REMOVE, _LOAD, _ALLOCATE_TASK, _DEALLOCATE_TASK, _ALLOCATE_DATA_FLOWS, _DEALLOCATE_DATA_FLOW = range(7)
+_EVENTS = ("add", "remove", "load", "allocate_task", "deallocate_task", "allocate_data_flows", "deallocate_data_flow")
+_KINDS = {event: kind for kind, event in enumerate(_EVENTS)}
+
+Selector = Union[PowerAware, Collection[PowerAware], Callable[["ReplayState"], Collection[PowerAware]]]
+
+
+class AllocationLog:
+    def __init__(self, infrastructure: Infrastructure, env: simpy.Environment):
+        """Append-only log of all state changes of an infrastructure that affect its power usage.
+
+        The log records, together with the simulated time, when nodes and links are added or removed, the load
+        (used compute units or bandwidth) of nodes and links after every change, and the (de)allocations of tasks and
+        data flows. Afterwards, :meth:`replay` derives power series for any grouping of entities and any sampling
+        interval from the log, so a simulation can be run once without any power meters and be analyzed offline.
+
+        Only changes of the given infrastructure are logged, even if several simulations run in the same process. The
+        log should be closed when it is no longer needed, e.g. by using it as a context manager.
+
+        Example:
+            ::
+
+                with AllocationLog(city.infrastructure, env) as log:
+                    env.run(until=SIMULATION_TIME)
+                series = log.replay({
+                    "cloud": city.infrastructure.nodes(type_filter=Cloud),
+                    "wifi": lambda state: state.links(type_filter=LinkWifiBetweenTrafficLights),
+                    "v2i": lambda state: [taxi.application for taxi in state.nodes(type_filter=Taxi)],
+                })
+
+        Note:
+            Replaying evaluates the power models of the logged nodes and links with the logged loads, without
+            modifying the nodes and links. Power models that depend on other state, e.g.
+            :class:`~leaf.power.PowerModelLinkWirelessTx` on mobile nodes, are evaluated with the state at the time of
+            the replay. Overrides of `measure_power()` in subclasses of :class:`~leaf.infrastructure.Node` or
+            :class:`~leaf.infrastructure.Link`, e.g. nodes that report no power while shut down, are not replayed.
+
+        Args:
+            infrastructure: The infrastructure to be logged. Its current state is recorded as initial state.
+            env: Simpy environment, used to timestamp all changes.
+        """
+        self.infrastructure = infrastructure
+        self.env = env
+        self.start_time = env.now
+        self._times = array.array("d")
+        self._kinds = array.array("B")
+        self._subjects: List[Any] = []
+        self._values: List[Any] = []
+        self._entities: Set[Union[Node, Link]] = set()  # Nodes and links currently part of the infrastructure
+        self._closed = False
+
+        for entity in infrastructure.nodes() + infrastructure.links():
+            self._on_topology_change("add", entity)
+        # Data flows between tasks on the same node are placed on an empty path, so they are only found via applications
+        data_flows: Dict[DataFlow, None] = {}
+        for node in infrastructure.nodes():
+            for task in node.tasks:
+                self._append(_ALLOCATE_TASK, task, node)
+                if task._application is not None:
+                    data_flows.update(dict.fromkeys(task._application.data_flows()))
+        for link in infrastructure.links():
+            data_flows.update(dict.fromkeys(link.data_flows))
+        for data_flow in data_flows:
+            if data_flow.links is not None:
+                self._append(_ALLOCATE_DATA_FLOWS, (data_flow,), data_flow.links)
+        infrastructure._topology_listeners.append(self._on_topology_change)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(events={len(self)})"
+
+    def __len__(self):
+        return len(self._times)
+
+    def __enter__(self) -> "AllocationLog":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def events(self) -> Iterator[Tuple[float, str, Any, Any]]:
+        """Iterate over all logged events as (time, event, subject, value) tuples.
+
+        Events are `add` and `remove` of a node or link, `load` of a node or link with its new load as value,
+        `allocate_task` and `deallocate_task` with the node as value, `allocate_data_flows` of a tuple of data flows
+        with their links as value, and `deallocate_data_flow` with the links as value.
+        """
+        for time, kind, subject, value in zip(self._times, self._kinds, self._subjects, self._values):
+            yield time, _EVENTS[kind], subject, value
+
+    def close(self):
+        """Stop logging. The log can still be replayed afterwards."""
+        if self._closed:
+            return
+        self._closed = True
+        self.infrastructure._topology_listeners.remove(self._on_topology_change)
+        for entity in self._entities:
+            entity._load_listeners.remove(self._on_load)
+            entity._allocation_listeners.remove(self._on_allocation)
+        self._entities.clear()
+
+    def replay(self,
+               selectors: Mapping[str, Selector],
+               interval: float = 1,
+               start: Optional[float] = None,
+               end: Optional[float] = None) -> Dict[str, PowerSeries]:
+        """Derive power series from the log, as if power meters had been running during the simulation.
+
+        Every sample reflects the state after all changes up to and including its timestamp, like a
+        :class:`~leaf.power.PowerMeter` which measures after all other processes of the time step.
+
+        Args:
+            selectors: Mapping from series names to the entities whose summed power is recorded. Like the entities of
+                a power meter, these can be a single entity, a collection of entities, or a function which receives the
+                :class:`ReplayState` at the sample time and returns the entities, e.g.
+                `lambda state: state.nodes(type_filter=Taxi)`. Supported entities are nodes, links, tasks, data flows,
+                applications and power aggregates.
+            interval: Time between two samples.
+            start: Time of the first sample. Defaults to the time the log was started.
+            end: Time until which samples are taken (exclusive). Defaults to the current simulated time.
+
+        Returns:
+            A power series per selector.
+        """
+        start = self.start_time if start is None else start
+        end = self.env.now if end is None else end
+        series = {name: PowerSeries() for name in selectors}
+        state = ReplayState()
+        i, n = 0, len(self._times)
+        time = start
+        while time < end:
+            while i < n and self._times[i] <= time:
+                state._apply(self._kinds[i], self._subjects[i], self._values[i])
+                i += 1
+            for name, selector in selectors.items():
+                series[name].append(time, state.measure(selector))
+            time += interval
+        return series
+
+    def _append(self, kind: int, subject: Any, value: Any = None):
+        self._times.append(self.env.now)
+        self._kinds.append(kind)
+        self._subjects.append(subject)
+        self._values.append(value)
+
+    def _on_topology_change(self, event: str, entity: Union[Node, Link]):
+        if event.startswith("add"):
+            self._append(_ADD, entity)
+            self._append(_LOAD, entity, _load(entity))
+            entity._load_listeners.append(self._on_load)
+            entity._allocation_listeners.append(self._on_allocation)
+            self._entities.add(entity)
+        else:
+            self._append(_REMOVE, entity)
+            entity._load_listeners.remove(self._on_load)
+            entity._allocation_listeners.remove(self._on_allocation)
+            self._entities.discard(entity)
+
+    def _on_load(self, entity: Union[Node, Link]):
+        self._append(_LOAD, entity, _load(entity))
+
+    def _on_allocation(self, event: str, subject: Any, value: Any):
+        if event == "allocate_data_flows":
+            subject = tuple(subject)
+        self._append(_KINDS[event], subject, value)
+
+
+class ReplayState:
+    def __init__(self):
+        """State of the infrastructure at a certain point in time during :meth:`AllocationLog.replay`.
+
+        The state keeps the logged load (used compute units or bandwidth) of all nodes and links and measures them by
+        evaluating their power models for that load, so the live nodes and links are never modified. Tasks and data
+        flows are measured on the node and links they were placed on at that time.
+        """
+        self._nodes = TypeIndex()
+        self._links = TypeIndex()
+        self._loads: Dict[Union[Node, Link], float] = {}
+        self._task_nodes: Dict[Task, Node] = {}
+        self._data_flow_links: Dict[DataFlow, List[Link]] = {}
+
+    def nodes(self, type_filter=None) -> List[Node]:
+        """Return all nodes that were part of the infrastructure, optionally filtered by class."""
+        return self._nodes.query(type_filter)
+
+    def links(self, type_filter=None) -> List[Link]:
+        """Return all links that were part of the infrastructure, optionally filtered by class."""
+        return self._links.query(type_filter)
+
+    def load_of(self, entity: Union[Node, Link]) -> float:
+        """Return the used compute units of a node or the used bandwidth of a link."""
+        return self._loads[entity]
+
+    def node_of(self, task: Task) -> Optional[Node]:
+        """Return the node a task was placed on."""
+        return self._task_nodes.get(task)
+
+    def links_of(self, data_flow: DataFlow) -> Optional[List[Link]]:
+        """Return the links a data flow was placed on."""
+        return self._data_flow_links.get(data_flow)
+
+    def measure(self, selector: Selector) -> PowerMeasurement:
+        """Return the summed power usage of the entities of a selector, see :meth:`AllocationLog.replay`."""
+        if isinstance(selector, PowerAggregate):
+            entities = list(selector._measurements)
+        elif isinstance(selector, (PowerAware, Collection)):
+            entities = [selector] if isinstance(selector, PowerAware) else selector
+        elif callable(selector):
+            entities = selector(self)
+        else:
+            raise ValueError(f"Unsupported selector {selector}.")
+        dynamic = static = 0
+        for entity in entities:
+            measurement = self._measure_entity(entity)
+            dynamic += measurement.dynamic
+            static += measurement.static
+        return PowerMeasurement(dynamic, static)
+
+    def _measure_entity(self, entity: PowerAware) -> PowerMeasurement:
+        if isinstance(entity, (Node, Link)):
+            return self._measure_load(entity)
+        if isinstance(entity, Task):
+            node = self._placement(entity, self._task_nodes)
+            used_cu = self._loads[node]
+            if not used_cu:
+                return PowerMeasurement(0, 0)
+            return self._measure_load(node).multiply(entity.cu / used_cu)
+        if isinstance(entity, DataFlow):
+            links = self._placement(entity, self._data_flow_links)
+            return PowerMeasurement.sum(self._measure_load(link).multiply(entity.bit_rate / self._loads[link])
+                                        for link in links)
+        if isinstance(entity, Application):
+            return self._measure_application(entity)
+        if isinstance(entity, PowerAggregate):
+            return self.measure(entity)
+        raise TypeError(f"Cannot replay the power usage of {entity}.")
+
+    def _measure_application(self, application: Application) -> PowerMeasurement:
+        # Same computation as the measurement plan of applications, but on the replayed placement
+        cu_by_node: Dict[Node, float] = {}
+        for task in application.tasks():
+            node = self._placement(task, self._task_nodes)
+            cu_by_node[node] = cu_by_node.get(node, 0) + task.cu
+        bit_rate_by_link: Dict[Link, float] = {}
+        for data_flow in application.data_flows():
+            for link in self._placement(data_flow, self._data_flow_links):
+                bit_rate_by_link[link] = bit_rate_by_link.get(link, 0) + data_flow.bit_rate
+        dynamic = static = 0
+        for node, cu in cu_by_node.items():
+            used_cu = self._loads[node]
+            if used_cu:
+                measurement = self._measure_load(node)
+                share = cu / used_cu
+                dynamic += measurement.dynamic * share
+                static += measurement.static * share
+        for link, bit_rate in bit_rate_by_link.items():
+            used_bandwidth = self._loads[link]
+            if used_bandwidth:
+                measurement = self._measure_load(link)
+                share = bit_rate / used_bandwidth
+                dynamic += measurement.dynamic * share
+                static += measurement.static * share
+        return PowerMeasurement(dynamic, static)
+
+    def _measure_load(self, entity: Union[Node, Link]) -> PowerMeasurement:
+        if entity.power_model is None:
+            return PowerMeasurement(0, 0)
+        return entity.power_model.measure(self._loads[entity])
+
+    @staticmethod
+    def _placement(entity, placements: Dict):
+        try:
+            return placements[entity]
+        except KeyError:
+            raise RuntimeError(f"Cannot measure power: {entity} was not placed at this time.") from None
+
+    def _apply(self, kind: int, subject: Any, value: Any):
+        if kind == _LOAD:
+            self._loads[subject] = value
+        elif kind == _ADD:
+            (self._nodes if isinstance(subject, Node) else self._links).add(subject)
+        elif kind == _REMOVE:
+            (self._nodes if isinstance(subject, Node) else self._links).remove(subject)
+        elif kind == _ALLOCATE_TASK:
+            self._task_nodes[subject] = value
+        elif kind == _DEALLOCATE_TASK:
+            del self._task_nodes[subject]
+        elif kind == _ALLOCATE_DATA_FLOWS:
+            for data_flow in subject:
+                self._data_flow_links[data_flow] = value
+        elif kind == _DEALLOCATE_DATA_FLOW:
+            del self._data_flow_links[subject]
+
+
+def _load(entity: Union[Node, Link]) -> float:
+    return entity.used_cu if isinstance(entity, Node) else entity.used_bandwidth
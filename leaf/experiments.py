@@ -0,0 +1,102 @@
+import collections.abc
+import itertools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Sequence, Any, Mapping, Union, Optional, List
+
+import numpy as np
+import pandas as pd
+
+from leaf.power import PowerSeries, PowerMeter
+
+logger = logging.getLogger(__name__)
+
+ParameterGrid = Mapping[str, Sequence[Any]]
+ScenarioResult = Mapping[str, Union[PowerSeries, PowerMeter, pd.DataFrame]]
+Scenario = Callable[..., ScenarioResult]
+
+# Keyword argument passed to every scenario and columns added to or contained in the results of every run
+_RESERVED_NAMES = ("rng", "run", "replication", "series", "time", "dynamic", "static")
+
+
+def run_sweep(scenario: Scenario,
+              parameter_grid: Union[ParameterGrid, Sequence[ParameterGrid]],
+              replications: int = 1,
+              seed: int = 0,
+              max_workers: Optional[int] = None) -> pd.DataFrame:
+    """Run a scenario for every combination of parameters on a pool of worker processes.
+
+    Each configuration of the parameter grid is run `replications` times. Every run receives its own random number
+    generator, which is derived from `seed` via :class:`numpy.random.SeedSequence`, so runs are statistically
+    independent and the results do not depend on the number of workers or the order in which runs finish.
+
+    Example:
+        A scenario which is called with `rng`, `fog_dcs` and `idle_shutdown` and returns the power meters it ran::
+
+            def city_scenario(rng, fog_dcs, idle_shutdown):
+                ...
+                return {"cloud": pm_cloud, "fog": pm_fog}
+
+            results = run_sweep(city_scenario, {"fog_dcs": [0, 2, 4, 6], "idle_shutdown": [False, True]}, replications=3)
+
+    Args:
+        scenario: Function that builds and runs a simulation. It is called with the keyword argument `rng` (a
+            :class:`numpy.random.Generator`) and one keyword argument per parameter and returns a mapping from
+            series names to :class:`~leaf.power.PowerSeries`, :class:`~leaf.power.PowerMeter` or
+            :class:`pandas.DataFrame` results. Must be picklable, i.e. defined at module level.
+        parameter_grid: Mapping from parameter names to the values that shall be evaluated. All combinations of these
+            values are run. A list of such mappings runs the union of their combinations, which allows to sweep
+            parameters that only make sense together with certain values of other parameters. Parameters must not be
+            named like the columns of the result or `rng`.
+        replications: Number of runs per configuration.
+        seed: Root seed from which the random number generators of all runs are derived.
+        max_workers: Maximum number of worker processes. Defaults to the number of CPUs. If 1, all runs are executed
+            sequentially in the current process.
+
+    Returns:
+        A long-format DataFrame with one row per recorded sample and the columns `run`, `replication`, one column per
+        parameter, `series`, and the columns of the individual results (`time`, `dynamic`, `static` for power series).
+    """
+    if isinstance(parameter_grid, collections.abc.Mapping):
+        parameter_grid = [parameter_grid]
+    reserved = sorted({name for grid in parameter_grid for name in grid if name in _RESERVED_NAMES})
+    if reserved:
+        raise ValueError(f"Parameter names {reserved} are reserved, as they collide with the keyword argument `rng` "
+                         f"or the columns of the result.")
+    configurations = [dict(zip(grid, values)) for grid in parameter_grid for values in itertools.product(*grid.values())]
+    runs = [(configuration, replication) for configuration in configurations for replication in range(replications)]
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(runs))
+    logger.info("Running %d configurations x %d replications.", len(configurations), replications)
+
+    if max_workers == 1:
+        frames = [_run(scenario, run_id, configuration, replication, seed_sequence)
+                  for run_id, ((configuration, replication), seed_sequence) in enumerate(zip(runs, seed_sequences))]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_run, scenario, run_id, configuration, replication, seed_sequence)
+                       for run_id, ((configuration, replication), seed_sequence) in enumerate(zip(runs, seed_sequences))]
+            frames = [future.result() for future in futures]
+    return pd.concat(frames, ignore_index=True)
+
+
+def _run(scenario: Scenario,
+         run_id: int,
+         configuration: Dict[str, Any],
+         replication: int,
+         seed_sequence: np.random.SeedSequence) -> pd.DataFrame:
+    """Execute a single run and convert its results into a long-format DataFrame."""
+    results = scenario(rng=np.random.default_rng(seed_sequence), **configuration)
+    frames: List[pd.DataFrame] = []
+    for series_name, result in results.items():
+        if isinstance(result, PowerMeter):
+            result = result.measurements
+        if isinstance(result, PowerSeries):
+            result = result.to_dataframe()
+        frame = result.copy()
+        frame.insert(0, "series", series_name)
+        for position, (name, value) in enumerate(configuration.items()):
+            frame.insert(position, name, value)
+        frame.insert(0, "replication", replication)
+        frame.insert(0, "run", run_id)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
@@ -1,13 +1,19 @@
+import heapq
+import itertools
 import math
-from typing import List, Optional, Type, TypeVar, Iterator, Union, Tuple
+from typing import List, Optional, Type, TypeVar, Union, Tuple, Callable, Dict, Any
 
 import networkx as nx
+import numpy as np
 
-from leaf.power import PowerAware, PowerMeasurement
+from leaf.power import PowerAware, PowerMeasurement, PowerAggregate, PowerModelNode, PowerModelLink
 from leaf.mobility import Location
 
 
 class Node(PowerAware):
+    __slots__ = ("name", "cu", "used_cu", "tasks", "power_model", "location", "_load_listeners",
+                 "_allocation_listeners")
+
     def __init__(self, name: str,
                  cu: Optional[float] = None,
                  power_model: Optional["PowerModelNode"] = None,
@@ -33,13 +39,15 @@ class Node(PowerAware):
         else:
             self.cu = cu
         self.used_cu = 0
-        self.tasks: List["Task"] = []
+        self.tasks: Dict["Task", None] = {}  # Insertion-ordered set for O(1) removal
+        self._load_listeners: List[Callable[["Node"], None]] = []
+        self._allocation_listeners: List[Callable[[str, Any, Any], None]] = []  # Called after tasks were (de)allocated
 
-        if power_model:
+        self.power_model = power_model
+        if power_model is not None:
             if cu is None and power_model.max_power is not None:
                 raise ValueError("Cannot use PowerModelNode with `max_power` on a compute node with unlimited "
                                  "processing power")
-            self.power_model = power_model
             self.power_model.set_parent(self)
 
         self.location = location
@@ -62,7 +70,7 @@ class Node(PowerAware):
         Private as this is only called by leaf.application.Task and not part of the public interface.
         """
         self._reserve_cu(task.cu)
-        self.tasks.append(task)
+        self.tasks[task] = None
 
     def _remove_task(self, task: "Task"):
         """Remove a task from the node.
@@ -70,28 +78,34 @@ class Node(PowerAware):
         Private as this is only called by leaf.application.Task and not part of the public interface.
         """
         self._release_cu(task.cu)
-        self.tasks.remove(task)
+        del self.tasks[task]
 
     def measure_power(self) -> PowerMeasurement:
-        try:
-            return self.power_model.measure()
-        except AttributeError:
+        if self.power_model is None:
             return PowerMeasurement(0, 0)
+        return self.power_model.measure()
 
     def _reserve_cu(self, cu: float):
         new_used_cu = self.used_cu + cu
         if new_used_cu > self.cu:
             raise ValueError(f"Cannot reserve {cu} CU on compute node {self}.")
         self.used_cu = new_used_cu
+        for listener in self._load_listeners:
+            listener(self)
 
     def _release_cu(self, cu: float):
         new_used_cu = self.used_cu - cu
         if new_used_cu < 0:
             raise ValueError(f"Cannot release {cu} CU on compute node {self}.")
         self.used_cu = new_used_cu
+        for listener in self._load_listeners:
+            listener(self)
 
 
 class Link(PowerAware):
+    __slots__ = ("src", "dst", "bandwidth", "latency", "used_bandwidth", "power_model", "data_flows",
+                 "_load_listeners", "_allocation_listeners")
+
     def __init__(self, src: Node, dst: Node, bandwidth: float, power_model: "PowerModelLink", latency: float = 0):
         """A network link in the infrastructure graph.
 
@@ -116,7 +130,9 @@ class Link(PowerAware):
         self.used_bandwidth = 0
         self.power_model = power_model
         self.power_model.set_parent(self)
-        self.data_flows: List["DataFlow"] = []
+        self.data_flows: Dict["DataFlow", None] = {}  # Insertion-ordered set for O(1) removal
+        self._load_listeners: List[Callable[["Link"], None]] = []
+        self._allocation_listeners: List[Callable[[str, Any, Any], None]] = []  # Called after flows were (de)allocated
 
     def __repr__(self):
         latency_repr = f", latency={self.latency}" if self.latency else ""
@@ -128,7 +144,15 @@ class Link(PowerAware):
         Private as this is only called by leaf.application.DataFlow and not part of the public interface.
         """
         self._reserve_bandwidth(data_flow.bit_rate)
-        self.data_flows.append(data_flow)
+        self.data_flows[data_flow] = None
+
+    def _add_data_flows(self, data_flows: List["DataFlow"]):
+        """Add several data flows to the link, reserving their bandwidth at once.
+
+        Private as this is only called by leaf.application.DataFlow and not part of the public interface.
+        """
+        self._reserve_bandwidth(sum(data_flow.bit_rate for data_flow in data_flows))
+        self.data_flows.update(dict.fromkeys(data_flows))
 
     def _remove_data_flow(self, data_flow: "DataFlow"):
         """Remove a data flow from the link.
@@ -136,25 +160,218 @@ class Link(PowerAware):
         Private as this is only called by leaf.application.DataFlow and not part of the public interface.
         """
         self._release_bandwidth(data_flow.bit_rate)
-        self.data_flows.remove(data_flow)
+        del self.data_flows[data_flow]
+
+    def _remove_data_flows(self, data_flows: List["DataFlow"]):
+        """Remove several data flows from the link, releasing their bandwidth at once.
+
+        Private as this is only called by leaf.application.DataFlow and not part of the public interface.
+        """
+        self._release_bandwidth(sum(data_flow.bit_rate for data_flow in data_flows))
+        for data_flow in data_flows:
+            del self.data_flows[data_flow]
 
     def measure_power(self) -> PowerMeasurement:
-        try:
-            return self.power_model.measure()
-        except AttributeError:
-            return PowerMeasurement(0, 0)
+        return self.power_model.measure()
 
     def _reserve_bandwidth(self, bandwidth):
         new_used_bandwidth = self.used_bandwidth + bandwidth
         if new_used_bandwidth > self.bandwidth:
             raise ValueError(f"Cannot reserve {bandwidth} bandwidth on network link {self}.")
         self.used_bandwidth = new_used_bandwidth
+        for listener in self._load_listeners:
+            listener(self)
 
     def _release_bandwidth(self, bandwidth):
         new_used_bandwidth = self.used_bandwidth - bandwidth
         if new_used_bandwidth < 0:
             raise ValueError(f"Cannot release {bandwidth} bandwidth on network link {self}.")
         self.used_bandwidth = new_used_bandwidth
+        for listener in self._load_listeners:
+            listener(self)
+
+
+class ArrayPowerEngine(PowerAware):
+    _TypeFilter = Union[type, Tuple[type, ...]]
+
+    def __init__(self, capacity: int = 64):
+        """Array-backed power evaluation for large infrastructures.
+
+        The engine keeps the power-relevant state of all its nodes and links in NumPy arrays indexed by entity: the
+        current load (used CU or used bandwidth), the static power, and the incremental power per unit of load
+        (derived from `max_power`, `static_power` and `cu`, or `power_per_cu` of nodes and `energy_per_bit` of links).
+        Loads are kept up to date via the entities' load listeners, so the power usage of all entities, or of all
+        entities of certain types, is computed with a handful of vector operations.
+
+        Only nodes and links whose power is fully described by a :class:`~leaf.power.PowerModelNode` or
+        :class:`~leaf.power.PowerModelLink` are vectorized. Entities with other power models or an overridden
+        `measure_power()` are measured individually. Power model parameters are read once when an entity is added.
+
+        Args:
+            capacity: Initial number of rows before the arrays are reallocated.
+        """
+        capacity = max(capacity, 1)
+        self._load = np.zeros(capacity, dtype=np.float64)
+        self._static = np.zeros(capacity, dtype=np.float64)
+        self._coefficient = np.zeros(capacity, dtype=np.float64)
+        self._type_ids = np.zeros(capacity, dtype=np.intp)
+        self._size = 0
+        self._rows: Dict[PowerAware, int] = {}
+        self._free_rows: List[int] = []
+        self._types: List[type] = []
+        self._type_ids_by_type: Dict[type, int] = {}
+        self._scalar_entities: Dict[PowerAware, None] = {}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(vectorized={len(self._rows)}, scalar={len(self._scalar_entities)})"
+
+    def __len__(self):
+        return len(self._rows) + len(self._scalar_entities)
+
+    def __contains__(self, entity):
+        return entity in self._rows or entity in self._scalar_entities
+
+    def add(self, entity: Union[Node, Link]):
+        """Add a node or link to the engine."""
+        if entity in self:
+            return
+        params = _linear_power_params(entity)
+        if params is None:
+            self._scalar_entities[entity] = None
+            return
+        static, coefficient = params
+        row = self._free_rows.pop() if self._free_rows else self._next_row()
+        self._rows[entity] = row
+        self._load[row] = _load(entity)
+        self._static[row] = static
+        self._coefficient[row] = coefficient
+        self._type_ids[row] = self._type_id(type(entity))
+        entity._load_listeners.append(self._update)
+
+    def remove(self, entity: Union[Node, Link]):
+        """Remove a node or link from the engine."""
+        if entity in self._scalar_entities:
+            del self._scalar_entities[entity]
+            return
+        row = self._rows.pop(entity)
+        self._load[row] = self._static[row] = self._coefficient[row] = 0
+        self._free_rows.append(row)
+        entity._load_listeners.remove(self._update)
+
+    def measure_power(self, type_filter: Optional[_TypeFilter] = None) -> PowerMeasurement:
+        """Return the power usage of all entities, optionally filtered by class."""
+        load = self._load[:self._size]
+        static = self._static[:self._size]
+        coefficient = self._coefficient[:self._size]
+        scalar_entities = self._scalar_entities
+        if type_filter is not None:
+            type_mask = np.array([issubclass(t, type_filter) for t in self._types], dtype=bool)
+            mask = type_mask[self._type_ids[:self._size]] if self._types else np.zeros(self._size, dtype=bool)
+            load, static, coefficient = load[mask], static[mask], coefficient[mask]
+            scalar_entities = [entity for entity in scalar_entities if isinstance(entity, type_filter)]
+        measurement = PowerMeasurement(float(np.dot(coefficient, load)), float(static.sum()))
+        if scalar_entities:
+            measurement += PowerMeasurement.sum(entity.measure_power() for entity in scalar_entities)
+        return measurement
+
+    def _update(self, entity: Union[Node, Link]):
+        """Called by nodes and links after their load has changed."""
+        self._load[self._rows[entity]] = _load(entity)
+
+    def _next_row(self) -> int:
+        if self._size == len(self._load):
+            for attr in ("_load", "_static", "_coefficient", "_type_ids"):
+                old = getattr(self, attr)
+                new = np.zeros(2 * len(old), dtype=old.dtype)
+                new[:len(old)] = old
+                setattr(self, attr, new)
+        self._size += 1
+        return self._size - 1
+
+    def _type_id(self, cls: type) -> int:
+        try:
+            return self._type_ids_by_type[cls]
+        except KeyError:
+            self._type_ids_by_type[cls] = len(self._types)
+            self._types.append(cls)
+            return self._type_ids_by_type[cls]
+
+
+def _load(entity: Union[Node, Link]) -> float:
+    return entity.used_cu if isinstance(entity, Node) else entity.used_bandwidth
+
+
+def _linear_power_params(entity: Union[Node, Link]) -> Optional[Tuple[float, float]]:
+    """Return (static power, power per unit of load) if the entity's power is linear in its load, otherwise None."""
+    if isinstance(entity, Node):
+        if type(entity).measure_power is not Node.measure_power:
+            return None
+        model = entity.power_model
+        if model is None:
+            return 0, 0
+        if type(model) is not PowerModelNode:
+            return None
+        if model.max_power is None:
+            return model.static_power, model.power_per_cu
+        return model.static_power, (model.max_power - model.static_power) / entity.cu if entity.cu else 0
+    if isinstance(entity, Link):
+        if type(entity).measure_power is not Link.measure_power or type(entity.power_model) is not PowerModelLink:
+            return None
+        return 0, entity.power_model.energy_per_bit
+    return None
+
+
+class TypeIndex:
+    def __init__(self):
+        """Class-keyed index of entities, e.g. the nodes or links of an :class:`Infrastructure`, with cached queries.
+
+        Query results are cached per type filter and only invalidated if an entity of a matching class is added or
+        removed, so rebuilding a result costs O(matches) instead of a scan over all entities. Results are returned as
+        new lists in insertion order, like a scan over the infrastructure graph would.
+        """
+        self._entities: Dict[Any, int] = {}  # Entity -> insertion number
+        self._entities_by_type: Dict[type, Dict[Any, None]] = {}
+        self._views: Dict[Any, tuple] = {}
+        self._counter = itertools.count()
+
+    def add(self, entity):
+        """Add an entity to the index."""
+        cls = type(entity)
+        self._entities[entity] = next(self._counter)
+        self._entities_by_type.setdefault(cls, {})[entity] = None
+        self._invalidate(cls)
+
+    def remove(self, entity):
+        """Remove an entity from the index."""
+        cls = type(entity)
+        del self._entities[entity]
+        entities = self._entities_by_type[cls]
+        del entities[entity]
+        if not entities:
+            del self._entities_by_type[cls]
+        self._invalidate(cls)
+
+    def query(self, type_filter=None) -> list:
+        """Return all entities in insertion order, optionally filtered by class (including subclasses)."""
+        try:
+            return list(self._views[type_filter])
+        except KeyError:
+            pass
+        if type_filter is None:
+            view = tuple(self._entities)
+        else:
+            matches = [entities for cls, entities in self._entities_by_type.items() if issubclass(cls, type_filter)]
+            if len(matches) == 1:
+                view = tuple(matches[0])
+            else:  # Each class is in insertion order already, so merging them restores the overall insertion order
+                view = tuple(heapq.merge(*matches, key=self._entities.__getitem__))
+        self._views[type_filter] = view
+        return list(view)
+
+    def _invalidate(self, cls: type):
+        stale = [type_filter for type_filter in self._views if type_filter is None or issubclass(cls, type_filter)]
+        for type_filter in stale:
+            del self._views[type_filter]
 
 
 class Infrastructure(PowerAware):
@@ -163,50 +380,124 @@ class Infrastructure(PowerAware):
     _NodeTypeFilter = Union[Type[_TNode], Tuple[Type[_TNode], ...]]
     _LinkTypeFilter = Union[Type[_TLink], Tuple[Type[_TLink], ...]]
 
-    def __init__(self):
+    def __init__(self, incremental_power: bool = False, vectorized_power: bool = False):
         """Infrastructure graph of the simulated scenario.
 
         The infrastructure is a weighted, directed multigraph where every node contains a :class:`Node` and every edge
-        between contains a :class:`Link`.
+        between contains a :class:`Link`. Nodes and links are additionally indexed by class for fast type-filtered
+        lookups, so the graph should only be modified via the `add_*()` and `remove_*()` methods.
+
+        Args:
+            incremental_power: If True, the power usage of the infrastructure is maintained in a
+                :class:`~leaf.power.PowerAggregate` which is updated whenever resources are reserved or released.
+                :meth:`measure_power` is then O(1) instead of O(nodes + links).
+            vectorized_power: If True, the power usage of the infrastructure is computed by an
+                :class:`ArrayPowerEngine`, which also vectorizes type-filtered calls to :meth:`measure_power`.
+                Cannot be combined with `incremental_power`.
         """
+        if incremental_power and vectorized_power:
+            raise ValueError("The parameters `incremental_power` and `vectorized_power` cannot be combined.")
         self.graph = nx.MultiDiGraph()
+        self.topology_version = 0
+        self._nodes = TypeIndex()
+        self._links = TypeIndex()
+        self._topology_listeners: List[Callable[[str, Union[Node, Link]], None]] = []
+        self._power_engine: Optional[Union[PowerAggregate, ArrayPowerEngine]] = None
+        if incremental_power:
+            self._power_engine = PowerAggregate()
+        elif vectorized_power:
+            self._power_engine = ArrayPowerEngine()
 
     def node(self, node_name: str) -> Node:
         """Return a specific node by name."""
         return self.graph.nodes[node_name]["data"]
 
-    # TODO link()
+    def link(self, src_name: str, dst_name: str) -> Link:
+        """Return a specific link by the names of its source and destination node."""
+        return self.graph.edges[src_name, dst_name, 0]["data"]
 
     def add_link(self, link: Link):
         """Add a link to the infrastructure. Missing nodes will be added automatically."""
         self.add_node(link.src)
         self.add_node(link.dst)
         self.graph.add_edge(link.src.name, link.dst.name, data=link, latency=link.latency)
+        self._links.add(link)
+        if self._power_engine is not None:
+            self._power_engine.add(link)
+        self._notify("add_link", link)
 
     def add_node(self, node: Node):
         """Adds a node to the infrastructure."""
         if node.name not in self.graph:
             self.graph.add_node(node.name, data=node)
+            self._nodes.add(node)
+            if self._power_engine is not None:
+                self._power_engine.add(node)
+            self._notify("add_node", node)
+
+    def remove_link(self, link: Link):
+        """Removes a link from the infrastructure."""
+        for key, data in self.graph.get_edge_data(link.src.name, link.dst.name, default={}).items():
+            if data["data"] is link:
+                self.graph.remove_edge(link.src.name, link.dst.name, key)
+                break
+        else:
+            raise ValueError(f"{link} is not part of the infrastructure.")
+        self._links.remove(link)
+        if self._power_engine is not None:
+            self._power_engine.remove(link)
+        self._notify("remove_link", link)
 
     def remove_node(self, node: Node):
-        """Removes a node from the infrastructure."""
+        """Removes a node and all its incoming and outgoing links from the infrastructure."""
+        links = {link for _, _, link in self.graph.in_edges(node.name, data="data")}
+        links.update(link for _, _, link in self.graph.out_edges(node.name, data="data"))
         self.graph.remove_node(node.name)
+        for link in links:
+            self._links.remove(link)
+        self._nodes.remove(node)
+        if self._power_engine is not None:
+            for link in links:
+                self._power_engine.remove(link)
+            self._power_engine.remove(node)
+        for link in links:
+            self._notify("remove_link", link)
+        self._notify("remove_node", node)
+
+    def topology_changed(self):
+        """Signal a change of the topology that was not made via the `add_*()` and `remove_*()` methods.
+
+        This should be called after modifying :attr:`graph` directly or changing link attributes like the latency. It
+        increments :attr:`topology_version`, which invalidates all caches derived from the topology (e.g. the
+        :class:`~leaf.orchestrator.PathCache`).
+        """
+        self.topology_version += 1
 
     def nodes(self, type_filter: Optional[_NodeTypeFilter] = None) -> List[_TNode]:
-        """Return all nodes in the infrastructure, optionally filtered by class."""
-        nodes: Iterator[Node] = (v for _, v in self.graph.nodes.data("data"))
-        if type_filter is not None:
-            nodes = (node for node in nodes if isinstance(node, type_filter))
-        return list(nodes)
+        """Return all nodes in the infrastructure, optionally filtered by class (including subclasses).
+
+        Nodes are returned in insertion order. The result is a new list copied from a cached index, which is only
+        rebuilt if nodes of a matching class were added or removed.
+        """
+        return self._nodes.query(type_filter)
 
     def links(self, type_filter: Optional[_LinkTypeFilter] = None) -> List[_TLink]:
-        """Return all links in the infrastructure, optionally filtered by class."""
-        links: Iterator[Link] = (v for _, _, v in self.graph.edges.data("data"))
-        if type_filter is not None:
-            links = (link for link in links if isinstance(link, type_filter))
-        return list(links)
+        """Return all links in the infrastructure, optionally filtered by class (including subclasses).
 
-    def measure_power(self) -> PowerMeasurement:
-        measurements = [node.measure_power() for node in self.nodes()] + [link.measure_power() for link in self.links()]
+        Links are returned in insertion order. The result is a new list copied from a cached index, which is only
+        rebuilt if links of a matching class were added or removed.
+        """
+        return self._links.query(type_filter)
+
+    def _notify(self, event: str, entity: Union[Node, Link]):
+        for listener in self._topology_listeners:
+            listener(event, entity)
+
+    def measure_power(self, type_filter: Optional[Union[_NodeTypeFilter, _LinkTypeFilter]] = None) -> PowerMeasurement:
+        """Return the power usage of the infrastructure, optionally only of the nodes and links of a certain class."""
+        if isinstance(self._power_engine, ArrayPowerEngine):
+            return self._power_engine.measure_power(type_filter)
+        if self._power_engine is not None and type_filter is None:
+            return self._power_engine.measure_power()
+        measurements = [entity.measure_power() for entity in self.nodes(type_filter) + self.links(type_filter)]
         return PowerMeasurement.sum(measurements)
-
@@ -1,7 +1,13 @@
+import bisect
 import math
+from typing import Dict, Tuple, Optional, List, Any, Union, Type, Hashable, Sequence
+
+import numpy as np
 
 
 class Location:
+    __slots__ = ("x", "y")
+
     def __init__(self, x: float, y: float):
         self.x = x
         self.y = y
@@ -14,3 +20,268 @@ class Location:
 
     def __hash__(self):
         return hash((self.x, self.y))
+
+
+class Trajectory:
+    def __init__(self, waypoints: Union[Sequence[Location], np.ndarray], times: Sequence[float]):
+        """Piecewise linear movement of a mobile entity through a sequence of waypoints.
+
+        Waypoints and arrival times are stored as NumPy arrays, so the memory usage is O(waypoints) regardless of how
+        long the movement lasts or how often the location is queried. Locations in between waypoints are linearly
+        interpolated. Before the first and after the last arrival time, the entity stays at the first and last waypoint.
+
+        Args:
+            waypoints: Locations or an array of shape (n, 2) with the x and y coordinates of the waypoints.
+            times: Arrival times at the waypoints in ascending order.
+        """
+        if len(waypoints) > 0 and isinstance(waypoints[0], Location):
+            waypoints = [(location.x, location.y) for location in waypoints]
+        self.waypoints = np.asarray(waypoints, dtype=np.float64).reshape(-1, 2)
+        self.times = np.asarray(times, dtype=np.float64)
+        if len(self.waypoints) == 0:
+            raise ValueError("A trajectory requires at least one waypoint.")
+        if len(self.times) != len(self.waypoints):
+            raise ValueError(f"Got {len(self.waypoints)} waypoints but {len(self.times)} arrival times.")
+        if np.any(np.diff(self.times) < 0):
+            raise ValueError("Arrival times have to be in ascending order.")
+        # Python lists for scalar queries, which are much faster than NumPy calls on single values
+        self._time_list: List[float] = self.times.tolist()
+        self._waypoint_list: List[List[float]] = self.waypoints.tolist()
+
+    @classmethod
+    def from_speed(cls, waypoints: Union[Sequence[Location], np.ndarray], speed: float,
+                   start_time: float = 0) -> "Trajectory":
+        """Create a trajectory that moves through the waypoints at a constant speed, starting at `start_time`."""
+        if speed <= 0:
+            raise ValueError("`speed` has to be positive.")
+        if len(waypoints) > 0 and isinstance(waypoints[0], Location):
+            waypoints = [(location.x, location.y) for location in waypoints]
+        waypoints = np.asarray(waypoints, dtype=np.float64).reshape(-1, 2)
+        distances = np.hypot(*np.diff(waypoints, axis=0).T)
+        times = start_time + np.concatenate(([0], np.cumsum(distances))) / speed
+        return cls(waypoints, times)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(waypoints={len(self.waypoints)}, start={self.start_time}, end={self.end_time})"
+
+    @property
+    def start_time(self) -> float:
+        return float(self.times[0])
+
+    @property
+    def end_time(self) -> float:
+        return float(self.times[-1])
+
+    @property
+    def duration(self) -> float:
+        return float(self.times[-1] - self.times[0])
+
+    def location(self, time: float) -> Location:
+        """Return the location at a certain point in time."""
+        times = self._time_list
+        segment = bisect.bisect_right(times, time) - 1
+        if segment < 0:
+            return Location(*self._waypoint_list[0])
+        if segment >= len(times) - 1:
+            return Location(*self._waypoint_list[-1])
+        (x0, y0), (x1, y1) = self._waypoint_list[segment], self._waypoint_list[segment + 1]
+        fraction = (time - times[segment]) / (times[segment + 1] - times[segment])
+        return Location(x0 + fraction * (x1 - x0), y0 + fraction * (y1 - y0))
+
+    def locations(self, times: Union[Sequence[float], np.ndarray]) -> np.ndarray:
+        """Return the locations at several points in time as an array of shape (len(times), 2)."""
+        times = np.asarray(times, dtype=np.float64)
+        if len(self.waypoints) == 1:
+            return np.repeat(self.waypoints, len(times), axis=0)
+        segment = np.clip(np.searchsorted(self.times, times, side="right") - 1, 0, len(self.times) - 2)
+        start_times = self.times[segment]
+        durations = self.times[segment + 1] - start_times
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fractions = np.where(durations > 0, (times - start_times) / durations, 1)
+        fractions = np.clip(fractions, 0, 1)[:, np.newaxis]
+        starts = self.waypoints[segment]
+        return starts + fractions * (self.waypoints[segment + 1] - starts)
+
+
+def locations_at(trajectories: Sequence[Trajectory], time: float) -> np.ndarray:
+    """Return the locations of many trajectories at the same point in time as an array of shape (len(trajectories), 2).
+
+    The arrival times of all trajectories are concatenated and the times of the i-th trajectory are shifted by
+    `i * span`, where `span` exceeds the time range of all trajectories. The shifted times are globally sorted, so the
+    current segments of all trajectories are found by a single `searchsorted` call.
+    """
+    if len(trajectories) == 0:
+        return np.empty((0, 2))
+    lengths = np.array([len(trajectory.times) for trajectory in trajectories])
+    firsts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    lasts = firsts + lengths - 1
+    times = np.concatenate([trajectory.times for trajectory in trajectories])
+    waypoints = np.concatenate([trajectory.waypoints for trajectory in trajectories])
+
+    span = times.max() - times.min() + 1
+    shifts = np.arange(len(trajectories)) * span
+    clipped_times = np.clip(time, times[firsts], times[lasts])
+    index = np.searchsorted(times + np.repeat(shifts, lengths), clipped_times + shifts, side="right") - 1
+    segment = np.clip(index, firsts, np.maximum(lasts - 1, firsts))
+    next_segment = np.minimum(segment + 1, lasts)
+
+    start_times = times[segment]
+    durations = times[next_segment] - start_times
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fractions = np.where(durations > 0, (clipped_times - start_times) / durations, 1)
+    fractions = np.clip(fractions, 0, 1)[:, np.newaxis]
+    starts = waypoints[segment]
+    return starts + fractions * (waypoints[next_segment] - starts)
+
+
+class SpatialIndex:
+    _TypeFilter = Union[Type, Tuple[Type, ...]]
+
+    def __init__(self, cell_size: float):
+        """Uniform grid index for nearest-neighbour and range queries over :class:`Location` objects.
+
+        Items (e.g. infrastructure nodes) are registered with their location and sorted into square grid cells, so
+        queries only have to look at the cells around the query location. Moving items can be updated cheaply via
+        :meth:`update`, which only touches the grid if the item changed its cell.
+
+        Ties between equally distant items are broken by insertion order.
+
+        Args:
+            cell_size: Edge length of the grid cells. Works best if it is in the order of magnitude of typical query
+                radii, e.g. the range of a wireless access point.
+        """
+        if cell_size <= 0:
+            raise ValueError("`cell_size` has to be positive.")
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Dict[Hashable, None]] = {}
+        self._locations: Dict[Hashable, Location] = {}
+        self._cell_of: Dict[Hashable, Tuple[int, int]] = {}
+        self._order: Dict[Hashable, int] = {}
+        self._inserted = 0
+        self._bounds: Optional[Tuple[int, int, int, int]] = None  # Min/max x and y of all occupied cells, if known
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(items={len(self)}, cells={len(self._cells)}, cell_size={self.cell_size})"
+
+    def __len__(self):
+        return len(self._locations)
+
+    def __contains__(self, item):
+        return item in self._locations
+
+    def insert(self, item: Hashable, location: Optional[Location] = None):
+        """Register an item in the index.
+
+        Args:
+            item: The item to register.
+            location: Location of the item. Defaults to `item.location`.
+        """
+        if item in self._locations:
+            raise ValueError(f"{item} is already part of the index.")
+        self._order[item] = self._inserted
+        self._inserted += 1
+        self._place(item, item.location if location is None else location)
+
+    def remove(self, item: Hashable):
+        """Remove an item from the index."""
+        cell = self._cell_of.pop(item)
+        self._remove_from_cell(item, cell)
+        del self._locations[item]
+        del self._order[item]
+
+    def update(self, item: Hashable, location: Optional[Location] = None):
+        """Update the location of a moving item. Defaults to `item.location`."""
+        if location is None:
+            location = item.location
+        cell = self._cell(location)
+        if cell == self._cell_of[item]:
+            self._locations[item] = location
+        else:
+            self._remove_from_cell(item, self._cell_of[item])
+            self._place(item, location)
+
+    def location(self, item: Hashable) -> Location:
+        """Return the location under which an item is registered."""
+        return self._locations[item]
+
+    def within(self, location: Location, radius: float, type_filter: Optional[_TypeFilter] = None) -> List[Any]:
+        """Return all items within `radius` of `location` in insertion order, optionally filtered by class."""
+        cx, cy = self._cell(location)
+        reach = math.ceil(radius / self.cell_size)
+        result = []
+        for x in range(cx - reach, cx + reach + 1):
+            for y in range(cy - reach, cy + reach + 1):
+                for item in self._cells.get((x, y), ()):
+                    if type_filter is not None and not isinstance(item, type_filter):
+                        continue
+                    if location.distance(self._locations[item]) <= radius:
+                        result.append(item)
+        result.sort(key=self._order.__getitem__)
+        return result
+
+    def nearest(self, location: Location, type_filter: Optional[_TypeFilter] = None) -> Optional[Any]:
+        """Return the item closest to `location`, optionally filtered by class, or None if there is no such item.
+
+        The grid is searched in rings of cells around the query location until no unvisited cell can contain a
+        closer item.
+        """
+        if not self._cells:
+            return None
+        cx, cy = self._cell(location)
+        if self._bounds is None:
+            xs = [x for x, _ in self._cells]
+            ys = [y for _, y in self._cells]
+            self._bounds = min(xs), max(xs), min(ys), max(ys)
+        min_x, max_x, min_y, max_y = self._bounds
+        max_ring = max(cx - min_x, max_x - cx, cy - min_y, max_y - cy, 0)
+        best, best_key = None, None
+        for ring in range(max_ring + 1):
+            for cell in _ring(cx, cy, ring):
+                for item in self._cells.get(cell, ()):
+                    if type_filter is not None and not isinstance(item, type_filter):
+                        continue
+                    key = (location.distance(self._locations[item]), self._order[item])
+                    if best_key is None or key < best_key:
+                        best, best_key = item, key
+            # Items in the next ring are at least `ring * cell_size` away from the query location
+            if best_key is not None and best_key[0] < ring * self.cell_size:
+                break
+        return best
+
+    def _cell(self, location: Location) -> Tuple[int, int]:
+        return math.floor(location.x / self.cell_size), math.floor(location.y / self.cell_size)
+
+    def _place(self, item: Hashable, location: Location):
+        cell = self._cell(location)
+        items = self._cells.get(cell)
+        if items is None:
+            items = self._cells[cell] = {}
+            if self._bounds is not None or len(self._cells) == 1:
+                x, y = cell
+                min_x, max_x, min_y, max_y = self._bounds or (x, x, y, y)
+                self._bounds = min(min_x, x), max(max_x, x), min(min_y, y), max(max_y, y)
+        items[item] = None
+        self._cell_of[item] = cell
+        self._locations[item] = location
+
+    def _remove_from_cell(self, item: Hashable, cell: Tuple[int, int]):
+        items = self._cells[cell]
+        del items[item]
+        if not items:
+            del self._cells[cell]
+            # The bounds are only recomputed on the next query, and only if a cell on the boundary became empty
+            if self._bounds is not None and (cell[0] in self._bounds[:2] or cell[1] in self._bounds[2:]):
+                self._bounds = None
+
+
+def _ring(cx: int, cy: int, ring: int):
+    """Yield all grid cells with a Chebyshev distance of `ring` to the cell (cx, cy)."""
+    if ring == 0:
+        yield cx, cy
+        return
+    for x in range(cx - ring, cx + ring + 1):
+        yield x, cy - ring
+        yield x, cy + ring
+    for y in range(cy - ring + 1, cy + ring):
+        yield cx - ring, y
+        yield cx + ring, y
@@ -1,12 +1,11 @@
 import logging
 from abc import ABC, abstractmethod
-from functools import partial
-from typing import Callable, List
+from typing import Callable, List, Dict, Tuple, Set, Hashable, Union, Iterable, Collection
 
 import networkx as nx
 
-from leaf.application import ProcessingTask, Application, SourceTask, SinkTask
-from leaf.infrastructure import Infrastructure, Node
+from leaf.application import ProcessingTask, Application, SourceTask, SinkTask, DataFlow, Task
+from leaf.infrastructure import Infrastructure, Node, Link
 
 ProcessingTaskPlacement = Callable[[ProcessingTask, Application, Infrastructure], Node]
 DataFlowPath = Callable[[nx.Graph, str, str], List[str]]
@@ -14,6 +13,198 @@ DataFlowPath = Callable[[nx.Graph, str, str], List[str]]
 logger = logging.getLogger(__name__)
 
 
+class PathCache:
+    _Key = Tuple[str, str, Hashable]
+
+    def __init__(self, infrastructure: Infrastructure):
+        """Cache for shortest paths in the infrastructure graph.
+
+        Paths are cached by (source, target, weight) and invalidated precisely when the topology changes:
+
+        - Removing a link (or a node with its links) invalidates all cached paths which traverse this link.
+        - Adding a link `u -> v` can only shorten paths that pass through both `u` and `v`. If `u` has no incoming links,
+          only paths starting at `u` are invalidated; if `v` has no outgoing links, only paths ending at `v`. Otherwise,
+          all cached paths are invalidated.
+        - All paths are invalidated when :attr:`Infrastructure.topology_version` changes, see
+          :meth:`Infrastructure.topology_changed`.
+
+        All paths are computed with Dijkstra's algorithm from the source node, so among several paths of equal weight,
+        :meth:`shortest_path` and :meth:`shortest_paths` return the same one. The cache subscribes to topology changes
+        of the infrastructure until :meth:`close` is called.
+
+        Args:
+            infrastructure: The infrastructure whose graph the paths are computed on.
+        """
+        self.infrastructure = infrastructure
+        self.hits = 0
+        self.misses = 0
+        self._version = infrastructure.topology_version
+        self._paths: Dict[PathCache._Key, List[str]] = {}
+        self._keys_by_edge: Dict[Tuple[str, str], Set[PathCache._Key]] = {}
+        self._keys_by_source: Dict[str, Set[PathCache._Key]] = {}
+        self._keys_by_target: Dict[str, Set[PathCache._Key]] = {}
+        infrastructure._topology_listeners.append(self._on_topology_change)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(paths={len(self._paths)}, hits={self.hits}, misses={self.misses})"
+
+    def __len__(self):
+        return len(self._paths)
+
+    def shortest_path(self, graph: nx.Graph, source: str, target: str, weight: Hashable = "latency") -> List[str]:
+        """Return the shortest path from `source` to `target` in the infrastructure graph.
+
+        Has the same signature as :data:`DataFlowPath`. The returned list is shared with the cache and must not be
+        modified.
+        """
+        if self._version != self.infrastructure.topology_version:
+            self.clear()
+        key = (source, target, weight)
+        try:
+            path = self._paths[key]
+        except KeyError:
+            self.misses += 1
+            _, path = nx.single_source_dijkstra(graph, source, target, weight=weight)
+            self._insert(key, path)
+            return path
+        self.hits += 1
+        return path
+
+    def shortest_paths(self, graph: nx.Graph, source: str, targets: Collection[str],
+                       weight: Hashable = "latency") -> Dict[str, List[str]]:
+        """Return the shortest paths from `source` to all `targets`.
+
+        If any of the paths is not cached, a single shortest path tree is computed for `source` instead of searching
+        every missing path individually. The returned lists are shared with the cache and must not be modified.
+        """
+        if self._version != self.infrastructure.topology_version:
+            self.clear()
+        paths = {}
+        missing = []
+        for target in targets:
+            path = self._paths.get((source, target, weight))
+            if path is None:
+                missing.append(target)
+            else:
+                paths[target] = path
+        self.hits += len(paths)
+        if missing:
+            self.misses += len(missing)
+            tree = nx.single_source_dijkstra_path(graph, source, weight=weight)
+            for target in missing:
+                try:
+                    path = tree[target]
+                except KeyError:
+                    raise nx.NetworkXNoPath(f"Node {target} not reachable from {source}")
+                self._insert((source, target, weight), path)
+                paths[target] = path
+        return paths
+
+    def close(self):
+        """Stop listening to topology changes and invalidate all cached paths."""
+        if self._on_topology_change in self.infrastructure._topology_listeners:
+            self.infrastructure._topology_listeners.remove(self._on_topology_change)
+        self.clear()
+
+    def clear(self):
+        """Invalidate all cached paths."""
+        self._paths.clear()
+        self._keys_by_edge.clear()
+        self._keys_by_source.clear()
+        self._keys_by_target.clear()
+        self._version = self.infrastructure.topology_version
+
+    def _insert(self, key: _Key, path: List[str]):
+        self._paths[key] = path
+        for edge in nx.utils.pairwise(path):
+            self._keys_by_edge.setdefault(edge, set()).add(key)
+        self._keys_by_source.setdefault(key[0], set()).add(key)
+        self._keys_by_target.setdefault(key[1], set()).add(key)
+
+    def _discard(self, key: _Key):
+        path = self._paths.pop(key, None)
+        if path is None:
+            return
+        for edge in nx.utils.pairwise(path):
+            keys = self._keys_by_edge[edge]
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_edge[edge]
+        for keys_by_node, node in ((self._keys_by_source, key[0]), (self._keys_by_target, key[1])):
+            keys = keys_by_node[node]
+            keys.discard(key)
+            if not keys:
+                del keys_by_node[node]
+
+    def _on_topology_change(self, event: str, entity: Union[Node, Link]):
+        if not self._paths:
+            return
+        if event == "remove_link":
+            keys = self._keys_by_edge.get((entity.src.name, entity.dst.name), ())
+        elif event == "remove_node":
+            keys = self._keys_by_source.get(entity.name, set()) & self._keys_by_target.get(entity.name, set())
+        elif event == "add_link":
+            graph = self.infrastructure.graph
+            if graph.in_degree(entity.src.name) == 0:
+                keys = self._keys_by_source.get(entity.src.name, ())
+            elif graph.out_degree(entity.dst.name) == 0:
+                keys = self._keys_by_target.get(entity.dst.name, ())
+            else:
+                self.clear()
+                return
+        else:
+            return
+        for key in list(keys):
+            self._discard(key)
+
+
+class PlacementTransaction:
+    def __init__(self):
+        """Records task and data flow allocations so that they can be undone if a placement fails.
+
+        Used as a context manager, the transaction is rolled back if an exception is raised within the `with` block.
+        Rolling back only touches the tasks and data flows that were allocated via the transaction.
+
+        Example:
+            ::
+
+                with PlacementTransaction() as transaction:
+                    transaction.allocate_task(task, node)
+                    transaction.allocate_data_flows([data_flow], links)  # Deallocates `task` if this raises
+        """
+        self.tasks: List[Task] = []
+        self.data_flows: List[DataFlow] = []
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(tasks={len(self.tasks)}, data_flows={len(self.data_flows)})"
+
+    def __enter__(self) -> "PlacementTransaction":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.rollback()
+
+    def allocate_task(self, task: Task, node: Node):
+        """Place a task on a node, see :meth:`Task.allocate`."""
+        task.allocate(node)
+        self.tasks.append(task)
+
+    def allocate_data_flows(self, data_flows: List[DataFlow], links: List[Link]):
+        """Place several data flows on the same path of links, see :meth:`DataFlow.allocate_many`."""
+        DataFlow.allocate_many(data_flows, links)
+        self.data_flows.extend(data_flows)
+
+    def rollback(self):
+        """Deallocate all tasks and data flows that were allocated in this transaction, in reverse order."""
+        for data_flow in reversed(self.data_flows):
+            data_flow.deallocate()
+        for task in reversed(self.tasks):
+            task.deallocate()
+        self.data_flows.clear()
+        self.tasks.clear()
+
+
 class Orchestrator(ABC):
     def __init__(self, infrastructure: Infrastructure, shortest_path: DataFlowPath = None):
         """Orchestrator which is responsible for allocating/placing application tasks on the infrastructure.
@@ -23,16 +214,75 @@ class Orchestrator(ABC):
             shortest_path: A function for determining shortest/optimal paths between nodes.
                 This function is called for every data flow between nodes that have been placed on the infrastructure.
                 It takes the infrastructure graph, the source node, and target node and maps it to the list of nodes
-                on the path. Defaults to `networkx.shortest_path`. More algorithms can be found
+                on the path. Defaults to Dijkstra's algorithm with the link latency as weight, whose results are
+                cached in :attr:`path_cache`. More algorithms can be found
                 `here <https://networkx.org/documentation/stable/reference/algorithms/shortest_paths.html>`_.
         """
         self.infrastructure = infrastructure
         if shortest_path is None:
-            self.shortest_path = partial(nx.shortest_path, weight="latency")
+            self.path_cache = PathCache(infrastructure)
+            self.shortest_path = self.path_cache.shortest_path
+        else:
+            self.path_cache = None
+            self.shortest_path = shortest_path
+
+    def close(self):
+        """Release the :attr:`path_cache`, which otherwise keeps receiving topology changes of the infrastructure."""
+        if self.path_cache is not None:
+            self.path_cache.close()
 
     def place(self, application: Application):
-        """Place an application on the infrastructure."""
-        logger.info(f"Placing {application}:")
+        """Place an application on the infrastructure.
+
+        The placement is atomic: If a task or data flow cannot be placed, e.g. because a node does not have enough
+        free compute units, everything that was already allocated for the application is deallocated again before the
+        exception is propagated.
+        """
+        logger.info("Placing %s:", application)
+        with PlacementTransaction() as transaction:
+            self._place_tasks(application, transaction)
+            for src_task, dst_task, data_flow in application.edges():
+                shortest_path = self.shortest_path(self.infrastructure.graph, src_task.node.name, dst_task.node.name)
+                links = self._links_on_path(shortest_path)
+                logger.info("- %s on %s.", data_flow, links)
+                transaction.allocate_data_flows([data_flow], links)
+
+    def place_many(self, applications: Iterable[Application]):
+        """Place several applications on the infrastructure at once.
+
+        All tasks are placed first, in the order of the applications. Afterwards, data flows are grouped by the nodes
+        their tasks were placed on: paths are computed once per distinct (source node, target node) pair, using a
+        single shortest path tree per source node if the default routing is used, and the bandwidth of all data flows
+        on the same path is reserved at once.
+
+        The batch is placed atomically: If any task or data flow cannot be placed, all applications of the batch are
+        deallocated again before the exception is propagated.
+
+        Note:
+            As data flows are only placed after all tasks, :meth:`_processing_task_placement` does not see the
+            bandwidth reserved by the data flows of previously placed applications in the same batch.
+        """
+        with PlacementTransaction() as transaction:
+            data_flows_by_nodes: Dict[str, Dict[str, List[DataFlow]]] = {}
+            for application in applications:
+                logger.info("Placing %s:", application)
+                self._place_tasks(application, transaction)
+                for src_task, dst_task, data_flow in application.edges():
+                    src_name, dst_name = src_task.node.name, dst_task.node.name
+                    data_flows_by_nodes.setdefault(src_name, {}).setdefault(dst_name, []).append(data_flow)
+
+            for src_name, data_flows_by_dst in data_flows_by_nodes.items():
+                if self.path_cache is not None:
+                    paths = self.path_cache.shortest_paths(self.infrastructure.graph, src_name, data_flows_by_dst.keys())
+                else:
+                    paths = {dst_name: self.shortest_path(self.infrastructure.graph, src_name, dst_name)
+                             for dst_name in data_flows_by_dst}
+                for dst_name, data_flows in data_flows_by_dst.items():
+                    links = self._links_on_path(paths[dst_name])
+                    logger.info("- %s on %s.", data_flows, links)
+                    transaction.allocate_data_flows(data_flows, links)
+
+    def _place_tasks(self, application: Application, transaction: PlacementTransaction):
         for task in application.tasks():
             if isinstance(task, (SourceTask, SinkTask)):
                 node = task.bound_node
@@ -40,16 +290,12 @@ class Orchestrator(ABC):
                 node = self._processing_task_placement(task, application)
             else:
                 raise TypeError(f"Unknown task type {task}")
-            logger.info(f"- {task} on {node}.")
-            task.allocate(node)
-
-        for src_task_id, dst_task_id, data_flow in application.graph.edges.data("data"):
-            src_task = application.graph.nodes[src_task_id]["data"]
-            dst_task = application.graph.nodes[dst_task_id]["data"]
-            shortest_path = self.shortest_path(self.infrastructure.graph, src_task.node.name, dst_task.node.name)
-            links = [self.infrastructure.graph.edges[a, b, 0]["data"] for a, b in nx.utils.pairwise(shortest_path)]
-            logger.info(f"- {data_flow} on {links}.")
-            data_flow.allocate(links)
+            logger.info("- %s on %s.", task, node)
+            transaction.allocate_task(task, node)
+
+    def _links_on_path(self, path: List[str]) -> List[Link]:
+        edges = self.infrastructure.graph.edges
+        return [edges[a, b, 0]["data"] for a, b in nx.utils.pairwise(path)]
 
     @abstractmethod
     def _processing_task_placement(self, processing_task: ProcessingTask, application: Application) -> Node:
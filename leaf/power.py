@@ -1,16 +1,22 @@
 import logging
 import math
 from abc import ABC, abstractmethod
-from functools import reduce
-from typing import List, Union, Collection, Callable, Optional, Iterable
+from functools import reduce, partial
+from typing import List, Union, Collection, Callable, Optional, Iterable, Dict, Iterator, Tuple
 
+import numpy as np
 import simpy
 
+from leaf.sinks import MeasurementSink
+
 logger = logging.getLogger(__name__)
 _unnamed_power_meters_created = 0
+_unnamed_energy_meters_created = 0
 
 
 class PowerMeasurement:
+    __slots__ = ("dynamic", "static")
+
     def __init__(self, dynamic: float, static: float):
         """Power measurement of one or more entities at a certain point in time.
 
@@ -54,14 +60,235 @@ class PowerMeasurement:
         return float(self)
 
 
+class PowerSeries:
+    _COLUMNS = ("_time", "_dynamic", "_static")
+
+    def __init__(self, capacity: int = 1024):
+        """Columnar time series of power measurements backed by growable NumPy arrays.
+
+        Timestamps, dynamic and static power are stored in separate float64 arrays, i.e. every sample takes up
+        24 bytes instead of a full :class:`PowerMeasurement` object. The arrays grow by amortized doubling.
+
+        The series behaves like a read-only sequence of :class:`PowerMeasurement` objects, so existing code which
+        iterates over, indexes or slices measurements keeps working (slices are returned as lists), while :attr:`time`,
+        :attr:`dynamic`, :attr:`static`, :meth:`to_numpy` and :meth:`to_dataframe` give zero-copy access for vectorized
+        post-processing.
+
+        Args:
+            capacity: Initial number of samples that can be stored before the arrays are reallocated.
+        """
+        capacity = max(capacity, 1)
+        self._time = np.empty(capacity, dtype=np.float64)
+        self._dynamic = np.empty(capacity, dtype=np.float64)
+        self._static = np.empty(capacity, dtype=np.float64)
+        self._size = 0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(samples={self._size})"
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[PowerMeasurement, List[PowerMeasurement]]:
+        if isinstance(index, slice):  # Like slicing the list of measurements that power meters used to record
+            return [PowerMeasurement(dynamic, static)
+                    for dynamic, static in zip(self.dynamic[index].tolist(), self.static[index].tolist())]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError(f"{self.__class__.__name__} index out of range")
+        return PowerMeasurement(float(self._dynamic[index]), float(self._static[index]))
+
+    def __iter__(self) -> Iterator[PowerMeasurement]:
+        for dynamic, static in zip(self.dynamic.tolist(), self.static.tolist()):
+            yield PowerMeasurement(dynamic, static)
+
+    @property
+    def time(self) -> np.ndarray:
+        """Timestamps of all samples (view, no copy)."""
+        return self._time[:self._size]
+
+    @property
+    def dynamic(self) -> np.ndarray:
+        """Dynamic power of all samples in Watt (view, no copy)."""
+        return self._dynamic[:self._size]
+
+    @property
+    def static(self) -> np.ndarray:
+        """Static power of all samples in Watt (view, no copy)."""
+        return self._static[:self._size]
+
+    def append(self, time: float, measurement: PowerMeasurement):
+        """Append a measurement that was taken at `time`."""
+        if self._size == len(self._time):
+            self._grow(2 * self._size)
+        self._time[self._size] = time
+        self._dynamic[self._size] = measurement.dynamic
+        self._static[self._size] = measurement.static
+        self._size += 1
+
+    def clear(self):
+        """Remove all samples while keeping the allocated memory."""
+        self._size = 0
+
+    def to_numpy(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the (time, dynamic, static) columns as NumPy arrays (views, no copy)."""
+        return self.time, self.dynamic, self.static
+
+    def to_dataframe(self) -> "pandas.DataFrame":
+        """Return the series as a pandas DataFrame with the columns `time`, `dynamic` and `static`."""
+        import pandas as pd
+        return pd.DataFrame({"time": self.time, "dynamic": self.dynamic, "static": self.static}, copy=False)
+
+    def _grow(self, capacity: int):
+        for attr in self._COLUMNS:
+            old = getattr(self, attr)
+            array = np.empty(capacity, dtype=old.dtype)
+            array[:self._size] = old[:self._size]
+            setattr(self, attr, array)
+
+
+class RunLengthPowerSeries(PowerSeries):
+    _COLUMNS = PowerSeries._COLUMNS + ("_step", "_count")
+
+    def __init__(self, capacity: int = 64):
+        """Power series that only stores the points at which the measured power changes.
+
+        Consecutive samples with identical dynamic and static power which were taken in regular intervals are stored as
+        a single run of (start time, interval, number of samples, dynamic, static). The power of nodes and links is
+        piecewise constant, so long series of mostly idle or static infrastructure collapse to a few runs, while the
+        dense series can be restored exactly: :attr:`time`, :attr:`dynamic` and :attr:`static` expand the runs on
+        demand and are identical to what a :class:`PowerSeries` would have recorded.
+
+        Args:
+            capacity: Initial number of runs that can be stored before the arrays are reallocated.
+        """
+        super().__init__(capacity)
+        capacity = len(self._time)
+        self._step = np.full(capacity, np.nan, dtype=np.float64)
+        self._count = np.zeros(capacity, dtype=np.int64)
+        self._samples = 0
+        self._run_end: Optional[float] = None  # Time of the last sample of the current run
+        self._run_step: Optional[float] = None
+        self._run_dynamic: Optional[float] = None
+        self._run_static: Optional[float] = None
+        self._expanded: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(samples={self._samples}, runs={self._size})"
+
+    def __len__(self) -> int:
+        return self._samples
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[PowerMeasurement, List[PowerMeasurement]]:
+        if isinstance(index, slice):
+            return super().__getitem__(index)
+        if index < 0:
+            index += self._samples
+        if not 0 <= index < self._samples:
+            raise IndexError(f"{self.__class__.__name__} index out of range")
+        run = int(np.searchsorted(np.cumsum(self._count[:self._size]), index, side="right"))
+        return PowerMeasurement(float(self._dynamic[run]), float(self._static[run]))
+
+    @property
+    def time(self) -> np.ndarray:
+        """Timestamps of all samples (expanded from the runs)."""
+        return self._expand()[0]
+
+    @property
+    def dynamic(self) -> np.ndarray:
+        """Dynamic power of all samples in Watt (expanded from the runs)."""
+        return self._expand()[1]
+
+    @property
+    def static(self) -> np.ndarray:
+        """Static power of all samples in Watt (expanded from the runs)."""
+        return self._expand()[2]
+
+    @property
+    def runs(self) -> int:
+        """Number of stored runs."""
+        return self._size
+
+    def change_points(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the (start time, dynamic, static) columns of all runs as NumPy arrays (views, no copy)."""
+        return self._time[:self._size], self._dynamic[:self._size], self._static[:self._size]
+
+    def append(self, time: float, measurement: PowerMeasurement):
+        """Append a measurement that was taken at `time`."""
+        self._samples += 1
+        self._expanded = None
+        dynamic, static = measurement.dynamic, measurement.static
+        if dynamic == self._run_dynamic and static == self._run_static:
+            if self._run_step is None:
+                step = time - self._run_end
+                if self._run_end + step == time:  # The times of the run can be restored by repeatedly adding `step`
+                    self._run_step = step
+                    self._step[self._size - 1] = step
+                    self._extend_run(time)
+                    return
+            elif self._run_end + self._run_step == time:
+                self._extend_run(time)
+                return
+        if self._size == len(self._time):
+            self._grow(2 * self._size)
+        self._time[self._size] = time
+        self._dynamic[self._size] = dynamic
+        self._static[self._size] = static
+        self._step[self._size] = np.nan
+        self._count[self._size] = 1
+        self._size += 1
+        self._run_end = time
+        self._run_step = None
+        self._run_dynamic = dynamic
+        self._run_static = static
+
+    def clear(self):
+        """Remove all samples while keeping the allocated memory."""
+        super().clear()
+        self._samples = 0
+        self._run_end = self._run_step = self._run_dynamic = self._run_static = None
+        self._expanded = None
+
+    def _extend_run(self, time: float):
+        self._count[self._size - 1] += 1
+        self._run_end = time
+
+    def _expand(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self._expanded is None:
+            counts = self._count[:self._size]
+            time = np.repeat(self._time[:self._size], counts)
+            offset = 0
+            for count, step in zip(counts.tolist(), self._step[:self._size].tolist()):
+                if count > 1:  # Accumulate sequentially like the simulation clock, so the timestamps are bit-identical
+                    increments = time[offset:offset + count]
+                    increments[1:] = step
+                    np.cumsum(increments, out=increments)
+                offset += count
+            self._expanded = (time, np.repeat(self._dynamic[:self._size], counts),
+                              np.repeat(self._static[:self._size], counts))
+        return self._expanded
+
+
 class PowerModel(ABC):
-    """Abstract base class for power models."""
+    """Abstract base class for power models.
+
+    Power models and the entities they belong to are instantiated in large numbers, so the classes in this module
+    declare `__slots__`. Subclasses that do not declare `__slots__` themselves get a regular instance `__dict__`.
+    """
+
+    __slots__ = ()
 
     # TODO: Validator! Only one power model per entity
 
     @abstractmethod
-    def measure(self) -> PowerMeasurement:
-        """Return the current power usage."""
+    def measure(self, load: Optional[float] = None) -> PowerMeasurement:
+        """Return the current power usage.
+
+        Args:
+            load: If given, return the power usage the parent would have under this load (used compute units of nodes,
+                used bandwidth of links) instead of its current load, e.g. to evaluate past states.
+        """
 
     @abstractmethod
     def set_parent(self, parent):
@@ -72,6 +299,8 @@ class PowerModel(ABC):
 
 
 class PowerModelNode(PowerModel):
+    __slots__ = ("max_power", "power_per_cu", "static_power", "node")
+
     def __init__(self, max_power: float = None, power_per_cu: float = None, static_power: float = 0):
         """Power model for compute nodes with static and dynamic power usage.
 
@@ -95,11 +324,14 @@ class PowerModelNode(PowerModel):
         self.static_power = static_power
         self.node = None
 
-    def measure(self) -> PowerMeasurement:
+    def measure(self, load: Optional[float] = None) -> PowerMeasurement:
+        if load is None:
+            load = self.node.used_cu
         if self.max_power is not None:
-            dynamic_power = (self.max_power - self.static_power) * self.node.utilization()
+            utilization = load / self.node.cu if self.node.cu else 0
+            dynamic_power = (self.max_power - self.static_power) * utilization
         elif self.power_per_cu is not None:
-            dynamic_power = self.power_per_cu * self.node.used_cu
+            dynamic_power = self.power_per_cu * load
         else:
             raise RuntimeError("Invalid state of PowerModelNode: `max_power` and `power_per_cu` are undefined.")
         return PowerMeasurement(dynamic=dynamic_power, static=self.static_power)
@@ -109,6 +341,8 @@ class PowerModelNode(PowerModel):
 
 
 class PowerModelLink(PowerModel):
+    __slots__ = ("energy_per_bit", "link")
+
     def __init__(self, energy_per_bit: float):
         """Power model for network links.
 
@@ -118,8 +352,10 @@ class PowerModelLink(PowerModel):
         self.energy_per_bit = energy_per_bit
         self.link = None
 
-    def measure(self) -> PowerMeasurement:
-        dynamic_power = self.energy_per_bit * self.link.used_bandwidth
+    def measure(self, load: Optional[float] = None) -> PowerMeasurement:
+        if load is None:
+            load = self.link.used_bandwidth
+        dynamic_power = self.energy_per_bit * load
         return PowerMeasurement(dynamic=dynamic_power, static=0)
 
     def set_parent(self, parent):
@@ -127,6 +363,8 @@ class PowerModelLink(PowerModel):
 
 
 class PowerModelLinkWirelessTx(PowerModel):
+    __slots__ = ("energy_per_bit", "amplifier_dissipation", "link")
+
     def __init__(self, energy_per_bit: float, amplifier_dissipation: float):
         """Power model for transmitting on wireless network links.
 
@@ -144,10 +382,12 @@ class PowerModelLinkWirelessTx(PowerModel):
         self.amplifier_dissipation = amplifier_dissipation
         self.link = None
 
-    def measure(self) -> PowerMeasurement:
-        distance = self.link.src.distance(self.link.dst)
+    def measure(self, load: Optional[float] = None) -> PowerMeasurement:
+        if load is None:
+            load = self.link.used_bandwidth
+        distance = self.link.src.location.distance(self.link.dst.location)
         dissipation_energy_per_bit = self.amplifier_dissipation * distance ** 2
-        dynamic_power = (self.energy_per_bit + dissipation_energy_per_bit) * self.link.used_bandwidth
+        dynamic_power = (self.energy_per_bit + dissipation_energy_per_bit) * load
         return PowerMeasurement(dynamic=dynamic_power, static=0)
 
     def set_parent(self, parent):
@@ -160,11 +400,342 @@ class PowerAware(ABC):
     This may be parts of the infrastructure as well as applications.
     """
 
+    __slots__ = ()
+
     @abstractmethod
     def measure_power(self) -> PowerMeasurement:
         """Returns the power that is currently used by the entity."""
 
 
+class PowerAggregate(PowerAware):
+    def __init__(self, entities: Iterable[PowerAware] = ()):
+        """Running sum of the power usage of a set of nodes and links which is updated incrementally.
+
+        Instead of measuring all entities on every read, the aggregate subscribes to resource reservations and releases
+        of its entities and only re-measures the entity whose load changed. Reading the aggregate is therefore O(1)
+        regardless of the number of entities, which makes it a cheap target for a :class:`PowerMeter`.
+
+        Like nodes and links, the aggregate itself notifies load listeners whenever its power usage changed, which is
+        used by the :class:`EnergyMeter`.
+
+        Note:
+            The aggregate is only exact for entities whose power usage changes exclusively on resource reservations
+            and releases. Power models that depend on other state (e.g. :class:`PowerModelLinkWirelessTx` on
+            mobile nodes) are only re-evaluated once their load changes.
+
+        Args:
+            entities: Initial :class:`Node` and :class:`Link` entities of the aggregate.
+        """
+        self.dynamic = 0
+        self.static = 0
+        self._measurements: Dict[PowerAware, PowerMeasurement] = {}
+        self._load_listeners: List[Callable[["PowerAggregate"], None]] = []
+        for entity in entities:
+            self.add(entity)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(entities={len(self)}, dynamic={self.dynamic:.2f}W, static={self.static:.2f}W)"
+
+    def __len__(self):
+        return len(self._measurements)
+
+    def __contains__(self, entity):
+        return entity in self._measurements
+
+    def add(self, entity: PowerAware):
+        """Add an entity to the aggregate and subscribe to its load changes."""
+        if entity in self._measurements:
+            return
+        if not hasattr(entity, "_load_listeners"):
+            raise TypeError(f"Cannot aggregate {entity}: Only entities that notify about load changes, like nodes and "
+                            f"links, can be aggregated.")
+        measurement = entity.measure_power()
+        self._measurements[entity] = measurement
+        self.dynamic += measurement.dynamic
+        self.static += measurement.static
+        entity._load_listeners.append(self._update)
+        self._notify()
+
+    def remove(self, entity: PowerAware):
+        """Remove an entity from the aggregate and unsubscribe from its load changes."""
+        measurement = self._measurements.pop(entity)
+        self.dynamic -= measurement.dynamic
+        self.static -= measurement.static
+        entity._load_listeners.remove(self._update)
+        self._notify()
+
+    def refresh(self):
+        """Re-measure all entities, e.g. to discard accumulated floating point errors after very long simulations."""
+        for entity in self._measurements:
+            self._measurements[entity] = entity.measure_power()
+        total = PowerMeasurement.sum(self._measurements.values())
+        self.dynamic = total.dynamic
+        self.static = total.static
+        self._notify()
+
+    def measure_power(self) -> PowerMeasurement:
+        return PowerMeasurement(self.dynamic, self.static)
+
+    def _update(self, entity: PowerAware):
+        """Called by nodes and links after their load has changed."""
+        old = self._measurements[entity]
+        new = entity.measure_power()
+        self._measurements[entity] = new
+        self.dynamic += new.dynamic - old.dynamic
+        self.static += new.static - old.static
+        self._notify()
+
+    def _notify(self):
+        for listener in self._load_listeners:
+            listener(self)
+
+
+class PowerAttribution:
+    def __init__(self,
+                 entities: Union[Collection[PowerAware], Callable[[], Collection[PowerAware]]],
+                 env: Optional[simpy.Environment] = None):
+        """Attributes the power usage of nodes and links to the applications running on them in a single pass.
+
+        Every node is measured once and its power is split between its tasks proportionally to their compute units;
+        every link is measured once and split between its data flows proportionally to their bit rates. Shares are
+        booked on the :class:`~leaf.application.Application` of the task or data flow (or on the task or data flow
+        itself if it is not part of an application). The result is a sparse entity x consumer
+        :class:`AttributionMatrix` from which per-application power, per-entity power and the infrastructure total
+        can be read without measuring anything twice.
+
+        Note:
+            Only the given entities are attributed. Unlike :meth:`Application.measure_power`, the attribution therefore
+            does not include the power of links that were removed from the infrastructure while data flows were still
+            allocated on them.
+
+        Example:
+            Measuring the CCTV and V2I applications of the smart city scenario from one computation per time step::
+
+                attribution = PowerAttribution(city.infrastructure, env)
+                pm_cctv = PowerMeter(attribution.share(lambda: [tl.application for tl in traffic_lights]), name="cctv")
+                pm_v2i = PowerMeter(attribution.share(lambda: [taxi.application for taxi in taxis]), name="v2i")
+
+        Args:
+            entities: Can be either (1) a list of nodes and links (2) a function which returns a list of nodes and
+                links (3) an :class:`~leaf.infrastructure.Infrastructure`, in which case all of its nodes and links are
+                used.
+            env: Simpy environment. If set, the attribution is computed at most once per simulated time step and all
+                reads within the same time step share the result.
+        """
+        if hasattr(entities, "_topology_listeners"):  # Infrastructure
+            infrastructure = entities
+            entities = partial(_all_entities, infrastructure)
+        self.entities = entities
+        self.env = env
+        self._time: Optional[float] = None
+        self._matrix: Optional[AttributionMatrix] = None
+
+    def compute(self) -> "AttributionMatrix":
+        """Return the attribution of the current power usage."""
+        if self.env is not None and self._time == self.env.now:
+            return self._matrix
+        entities = list(self.entities() if callable(self.entities) else self.entities)
+        consumers: List[object] = [None]
+        consumer_columns: Dict[object, int] = {None: 0}
+        rows: List[int] = []
+        columns: List[int] = []
+        dynamic: List[float] = []
+        static: List[float] = []
+        for row, entity in enumerate(entities):
+            measurement = entity.measure_power()
+            if hasattr(entity, "tasks"):  # Node
+                load = entity.used_cu
+                parts = [(task, task.cu) for task in entity.tasks]
+            elif hasattr(entity, "data_flows"):  # Link
+                load = entity.used_bandwidth
+                parts = [(data_flow, data_flow.bit_rate) for data_flow in entity.data_flows]
+            else:
+                raise TypeError(f"Cannot attribute the power of {entity}: Only nodes and links are supported.")
+            if not load:
+                rows.append(row)
+                columns.append(0)
+                dynamic.append(measurement.dynamic)
+                static.append(measurement.static)
+                continue
+            for part, amount in parts:
+                if not amount:
+                    continue
+                consumer = part._application if part._application is not None else part
+                column = consumer_columns.get(consumer)
+                if column is None:
+                    column = consumer_columns[consumer] = len(consumers)
+                    consumers.append(consumer)
+                share = amount / load
+                rows.append(row)
+                columns.append(column)
+                dynamic.append(measurement.dynamic * share)
+                static.append(measurement.static * share)
+        self._matrix = AttributionMatrix(entities, consumers, np.array(rows, dtype=np.intp),
+                                         np.array(columns, dtype=np.intp), np.array(dynamic), np.array(static))
+        if self.env is not None:
+            self._time = self.env.now
+        return self._matrix
+
+    def share(self, consumers: Union[Collection, Callable[[], Collection]]) -> "AttributedPower":
+        """Return a :class:`PowerAware` view on the power attributed to a set of applications, e.g. for a meter."""
+        return AttributedPower(self, consumers)
+
+
+class AttributionMatrix:
+    def __init__(self,
+                 entities: List[PowerAware],
+                 consumers: List[object],
+                 rows: np.ndarray,
+                 columns: np.ndarray,
+                 dynamic: np.ndarray,
+                 static: np.ndarray):
+        """Sparse entity x consumer matrix of power usage in coordinate format, as computed by :class:`PowerAttribution`.
+
+        Row `i` refers to `entities[i]` and column `j` to `consumers[j]`. Column 0 is always `None` and holds power that
+        cannot be attributed to any consumer, i.e. the power of idle nodes and links. The same (row, column) pair can
+        occur several times if an application runs several tasks on the same node.
+        """
+        self.entities = entities
+        self.consumers = consumers
+        self.rows = rows
+        self.columns = columns
+        self.dynamic = dynamic
+        self.static = static
+        self._column_index: Optional[Dict[object, int]] = None
+        self._column_sums: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(entities={len(self.entities)}, consumers={len(self.consumers) - 1}, " \
+               f"entries={len(self.rows)})"
+
+    def total(self) -> PowerMeasurement:
+        """Return the total power usage of all entities."""
+        return PowerMeasurement(float(self.dynamic.sum()), float(self.static.sum()))
+
+    def unattributed(self) -> PowerMeasurement:
+        """Return the power usage of entities without any load."""
+        dynamic, static = self._sums_by_column()
+        return PowerMeasurement(float(dynamic[0]), float(static[0]))
+
+    def measure_power(self, consumers: Iterable) -> PowerMeasurement:
+        """Return the power attributed to the given consumers. Consumers without any share are ignored."""
+        if self._column_index is None:
+            self._column_index = {consumer: column for column, consumer in enumerate(self.consumers)}
+        columns = [self._column_index[consumer] for consumer in consumers if consumer in self._column_index]
+        dynamic, static = self._sums_by_column()
+        return PowerMeasurement(float(dynamic[columns].sum()), float(static[columns].sum()))
+
+    def by_consumer(self) -> Dict[object, PowerMeasurement]:
+        """Return the power attributed to each consumer, excluding unattributed power."""
+        dynamic, static = self._sums_by_column()
+        return {consumer: PowerMeasurement(float(d), float(s))
+                for consumer, d, s in zip(self.consumers[1:], dynamic[1:], static[1:])}
+
+    def by_entity(self) -> Dict[PowerAware, PowerMeasurement]:
+        """Return the power usage of each entity."""
+        dynamic = np.bincount(self.rows, weights=self.dynamic, minlength=len(self.entities))
+        static = np.bincount(self.rows, weights=self.static, minlength=len(self.entities))
+        return {entity: PowerMeasurement(float(d), float(s)) for entity, d, s in zip(self.entities, dynamic, static)}
+
+    def to_dataframe(self):
+        """Return the non-zero entries as a `pandas.DataFrame` with the columns entity, consumer, dynamic and static."""
+        import pandas as pd
+        return pd.DataFrame({"entity": [self.entities[row] for row in self.rows],
+                             "consumer": [self.consumers[column] for column in self.columns],
+                             "dynamic": self.dynamic,
+                             "static": self.static})
+
+    def _sums_by_column(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._column_sums is None:
+            self._column_sums = (np.bincount(self.columns, weights=self.dynamic, minlength=len(self.consumers)),
+                                 np.bincount(self.columns, weights=self.static, minlength=len(self.consumers)))
+        return self._column_sums
+
+
+class AttributedPower(PowerAware):
+    def __init__(self, attribution: PowerAttribution, consumers: Union[Collection, Callable[[], Collection]]):
+        """Power attributed to a set of consumers, see :meth:`PowerAttribution.share`.
+
+        Args:
+            attribution: The attribution engine.
+            consumers: Applications (or a function returning them) whose attributed power is measured.
+        """
+        self.attribution = attribution
+        self.consumers = consumers
+
+    def measure_power(self) -> PowerMeasurement:
+        consumers = self.consumers() if callable(self.consumers) else self.consumers
+        return self.attribution.compute().measure_power(consumers)
+
+
+class EnergyMeter:
+    """Energy meter that integrates the exact energy usage of one or more nodes and links over simulated time.
+
+    As the power usage of LEAF's power models is piecewise constant between resource reservations and releases, the
+    meter does not sample periodically. Instead, it is notified about every load change of its entities and accumulates
+    `power * Δt` of the interval that just ended. The result is the exact energy usage without any simulation process.
+
+    The same limitations as for the :class:`PowerAggregate` apply: Power models that change without a load change (e.g.
+    :class:`PowerModelLinkWirelessTx` on mobile nodes) are not integrated exactly.
+
+    Args:
+        entities: Can be either (1) a single :class:`Node` or :class:`Link` (2) a list of nodes and links
+            (3) a :class:`PowerAggregate` (4) an :class:`~leaf.infrastructure.Infrastructure`, in which case the meter
+            follows nodes and links that are added to or removed from the infrastructure.
+        env: Simpy environment (for timing the load changes)
+        name: Name of the energy meter for logging and reporting
+    """
+    def __init__(self,
+                 entities: Union[PowerAware, Collection[PowerAware], PowerAggregate],
+                 env: simpy.Environment,
+                 name: Optional[str] = None):
+        self.env = env
+        if name is None:
+            global _unnamed_energy_meters_created
+            self.name = f"energy_meter_{_unnamed_energy_meters_created}"
+            _unnamed_energy_meters_created += 1
+        else:
+            self.name = name
+        self.dynamic_energy = 0
+        self.static_energy = 0
+        if isinstance(entities, PowerAggregate):
+            self._aggregate = entities
+        elif hasattr(entities, "_topology_listeners"):  # Infrastructure
+            self._aggregate = PowerAggregate(entities.nodes() + entities.links())
+            entities._topology_listeners.append(self._on_topology_change)
+        elif isinstance(entities, PowerAware):
+            self._aggregate = PowerAggregate([entities])
+        else:
+            self._aggregate = PowerAggregate(entities)
+        self._power = self._aggregate.measure_power()
+        self._last_time = env.now
+        self._aggregate._load_listeners.append(self._on_power_change)
+
+    def __repr__(self):
+        energy = self.measure_energy()
+        return f"{self.__class__.__name__}('{self.name}', dynamic={energy.dynamic:.2f}Ws, static={energy.static:.2f}Ws)"
+
+    def measure_energy(self) -> PowerMeasurement:
+        """Return the dynamic and static energy in Ws (Joule) that was consumed since the meter was created."""
+        duration = self.env.now - self._last_time
+        return PowerMeasurement(self.dynamic_energy + self._power.dynamic * duration,
+                                self.static_energy + self._power.static * duration)
+
+    def _on_power_change(self, aggregate: PowerAggregate):
+        """Integrate the power of the interval that just ended before switching to the new power usage."""
+        duration = self.env.now - self._last_time
+        self.dynamic_energy += self._power.dynamic * duration
+        self.static_energy += self._power.static * duration
+        self._last_time = self.env.now
+        self._power = aggregate.measure_power()
+
+    def _on_topology_change(self, event: str, entity: PowerAware):
+        if event in ("add_node", "add_link"):
+            self._aggregate.add(entity)
+        elif entity in self._aggregate:
+            self._aggregate.remove(entity)
+
+
 class PowerMeter:
     """Power meter that stores the power of one or more entites in regular intervals.
 
@@ -175,12 +746,24 @@ class PowerMeter:
         name: Name of the power meter for logging and reporting
         measurement_interval: The freequency in which measurement take place.
         callback: A function which will be called with the PowerMeasurement result after each conducted measurement.
+        sink: A :class:`~leaf.sinks.MeasurementSink` which measurements are streamed to during the simulation. If set,
+            :attr:`measurements` only buffers the last measurements until `chunk_size` is reached, which keeps
+            memory usage constant. Call :meth:`close` after the simulation to write the remaining measurements.
+        chunk_size: Number of measurements that are buffered before they are written to the `sink`.
+        compress: Record the measurements in a :class:`RunLengthPowerSeries`, which only stores the points in time at
+            which the measured power changes. Recommended for long simulations of mostly static entities.
+
+    Measurements are recorded together with their timestamp in :attr:`measurements`, a columnar
+    :class:`PowerSeries` (or :class:`RunLengthPowerSeries` if `compress` is set).
     """
     def __init__(self,
                  entities: Union[PowerAware, Collection[PowerAware], Callable[[], Collection[PowerAware]]],
                  name: Optional[str] = None,
                  measurement_interval: Optional[float] = 1,
-                 callback: Optional[Callable[[PowerMeasurement], None]] = None):
+                 callback: Optional[Callable[[PowerMeasurement], None]] = None,
+                 sink: Optional[MeasurementSink] = None,
+                 chunk_size: int = 4096,
+                 compress: bool = False):
         self.entities = entities
         if name is None:
             global _unnamed_power_meters_created
@@ -190,7 +773,14 @@ class PowerMeter:
             self.name = name
         self.measurement_interval = measurement_interval
         self.callback = callback
-        self.measurements = []
+        self.sink = sink
+        self.chunk_size = chunk_size
+        if compress:
+            self.measurements = RunLengthPowerSeries()
+        elif sink is not None:
+            self.measurements = PowerSeries(capacity=chunk_size)
+        else:
+            self.measurements = PowerSeries()
 
     def run(self, env: simpy.Environment, delay: Optional[float] = 0):
         """Starts the power meter process.
@@ -206,18 +796,114 @@ class PowerMeter:
         """
         yield env.timeout(delay)
         while True:
-            if isinstance(self.entities, PowerAware):
-                measurement = self.entities.measure_power()
+            entities = self._entities()
+            if isinstance(entities, PowerAware):
+                measurement = entities.measure_power()
             else:
-                if isinstance(self.entities, Collection):
-                    entities = self.entities
-                elif isinstance(self.entities, Callable):
-                    entities = self.entities()
-                else:
-                    raise ValueError(f"{self.name}: Unsupported type {type(self.entities)} for observable={self.entities}.")
                 measurement = PowerMeasurement.sum(entity.measure_power() for entity in entities)
-            self.measurements.append(measurement)
-            if self.callback is not None:
-                self.callback(measurement)
-            logger.debug(f"{env.now}: {self.name}: {measurement}")
+            self._record(env.now, measurement)
+            yield env.timeout(self.measurement_interval)
+
+    def flush(self):
+        """Write all buffered measurements to the sink."""
+        if self.sink is None:
+            raise RuntimeError(f"{self.name}: Cannot flush measurements, no sink was configured.")
+        if len(self.measurements) > 0:
+            self.sink.write(*self.measurements.to_numpy())
+            self.measurements.clear()
+
+    def close(self):
+        """Write all buffered measurements to the sink and close it. Does nothing if no sink was configured."""
+        if self.sink is None:
+            return
+        self.flush()
+        self.sink.close()
+
+    def _entities(self) -> Union[PowerAware, Collection[PowerAware]]:
+        """Return the entity or the collection of entities to be measured at the current time."""
+        if isinstance(self.entities, (PowerAware, Collection)):
+            return self.entities
+        if isinstance(self.entities, Callable):
+            return self.entities()
+        raise ValueError(f"{self.name}: Unsupported type {type(self.entities)} for observable={self.entities}.")
+
+    def _record(self, time: float, measurement: PowerMeasurement):
+        self.measurements.append(time, measurement)
+        if self.sink is not None and len(self.measurements) >= self.chunk_size:
+            self.flush()
+        if self.callback is not None:
+            self.callback(measurement)
+        logger.debug("%s: %s: %s", time, self.name, measurement)
+
+
+class MeterGroup:
+    def __init__(self, meters: Iterable[PowerMeter]):
+        """Runs several power meters with the same measurement interval in a single process.
+
+        Instead of every meter waking up separately and measuring its own entities, the group conducts all measurements
+        of a time step in one pass: Every distinct entity is measured only once, even if several meters subscribe to
+        it, and its measurement is added to the totals of all these meters. The measurements are recorded in the
+        :attr:`PowerMeter.measurements` of the individual meters (including their sinks and callbacks), so results
+        are the same as if every meter ran its own process.
+
+        Example:
+            ::
+
+                group = MeterGroup([pm_cloud, pm_fog, pm_wifi])
+                env.process(group.run(env))
+
+        Args:
+            meters: The power meters to be run. Their :meth:`PowerMeter.run` must not be started separately.
+        """
+        self.meters = list(meters)
+        intervals = {meter.measurement_interval for meter in self.meters}
+        if len(intervals) > 1:
+            raise ValueError(f"All meters of a {self.__class__.__name__} need the same measurement interval, "
+                             f"got {sorted(intervals)}.")
+        self.measurement_interval = intervals.pop() if intervals else 1
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({', '.join(meter.name for meter in self.meters)})"
+
+    def __len__(self):
+        return len(self.meters)
+
+    def __iter__(self) -> Iterator[PowerMeter]:
+        return iter(self.meters)
+
+    def run(self, env: simpy.Environment, delay: Optional[float] = 0):
+        """Starts the process which conducts the measurements of all meters.
+
+        Args:
+            env: Simpy environment (for timing the measurements)
+            delay: The delay after which the measurements shall be conducted, see :meth:`PowerMeter.run`.
+        """
+        yield env.timeout(delay)
+        while True:
+            self.measure(env.now)
             yield env.timeout(self.measurement_interval)
+
+    def measure(self, time: float):
+        """Measure the entities of all meters and record the results at `time`."""
+        measured: Dict[PowerAware, PowerMeasurement] = {}
+        for meter in self.meters:
+            entities = meter._entities()
+            if isinstance(entities, PowerAware):
+                measurement = measured.get(entities)
+                if measurement is None:
+                    measurement = measured[entities] = entities.measure_power()
+                meter._record(time, measurement)
+                continue
+            dynamic = static = 0
+            for entity in entities:
+                measurement = measured.get(entity)
+                if measurement is None:
+                    measurement = measured[entity] = entity.measure_power()
+                dynamic += measurement.dynamic
+                static += measurement.static
+            meter._record(time, PowerMeasurement(dynamic, static))
+
+
+def _all_entities(infrastructure) -> List:
+    """Return all nodes and links of an infrastructure. Unlike a lambda, a partial of this function can be pickled."""
+    return infrastructure.nodes() + infrastructure.links()
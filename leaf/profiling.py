@@ -0,0 +1,212 @@
+import functools
+import math
+import time
+import tracemalloc
+from typing import Callable, Dict, Generator, List, Optional, Tuple
+
+import simpy
+
+_Stack = Tuple[str, ...]
+
+
+class Profiler:
+    def __init__(self, env: simpy.Environment, window: Optional[float] = None, trace_allocations: bool = False):
+        """Attributes wall time, call counts and memory allocations to SimPy processes and instrumented functions.
+
+        Every time a profiled process is resumed by the environment, the wall time until it yields its next event is
+        attributed to the process. Instrumented functions which are called from within a profiled process, e.g.
+        :meth:`Orchestrator.place() <leaf.orchestrator.Orchestrator.place>` called by a mobility process, are recorded
+        as nested calls. All statistics are grouped by call stack and by simulated time window.
+
+        Example:
+            ::
+
+                profiler = Profiler(env, window=600)
+                profiler.attach()  # Profile all processes that are started from now on
+                city = City(env)
+                profiler.instrument(city.orchestrator, "place", "place_many")
+                env.run(until=3600)
+                print(profiler.to_dataframe())
+                profiler.write_collapsed("profile.collapsed")  # Input for flamegraph.pl or speedscope
+
+        Args:
+            env: Simpy environment, used to determine the simulated time window of every call.
+            window: Length of the simulated time windows. If None, all calls are aggregated into a single window.
+            trace_allocations: Additionally record the net number of bytes allocated by every call via
+                :mod:`tracemalloc`. This slows down the simulation considerably.
+        """
+        self.env = env
+        self.window = window
+        self.trace_allocations = trace_allocations
+        # Statistics by (window start, stack): [calls, wall time, self time, allocated bytes]
+        self._stats: Dict[Tuple[float, _Stack], List] = {}
+        # Open calls: [stack, window start, start time, wall time of nested calls, traced memory at start]
+        self._frames: List[List] = []
+        self._original_process: Optional[Callable] = None
+        self._started_tracemalloc = False
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(stacks={len(self._stats)})"
+
+    def attach(self):
+        """Profile all processes which are started via `env.process()` from now on."""
+        if self._original_process is not None:
+            return
+        self._original_process = self.env.process
+
+        def process(generator: Generator) -> simpy.Process:
+            return self._original_process(self.process(generator))
+        self.env.process = process
+
+    def detach(self):
+        """Stop profiling newly started processes and stop tracing allocations if this profiler started it.
+
+        Processes that were already wrapped and instrumented functions keep being recorded.
+        """
+        if self._original_process is not None:
+            self.env.process = self._original_process
+            self._original_process = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def process(self, generator: Generator, name: Optional[str] = None) -> Generator:
+        """Wrap a process generator, so that every step of the process is profiled.
+
+        Args:
+            generator: The generator which would otherwise be passed to `env.process()`.
+            name: Name of the process in the results. Defaults to the qualified name of the generator function,
+                followed by the `name` attribute of its object if it has one, e.g. `PowerMeter.run[cloud]`.
+        """
+        if name is None:
+            name = _process_name(generator)
+        return self._profiled_process(generator, name)
+
+    def instrument(self, obj: object, *method_names: str):
+        """Replace methods of an object by profiled versions.
+
+        Args:
+            obj: The object to be instrumented, e.g. an orchestrator or power meter.
+            method_names: Names of the methods to be instrumented.
+        """
+        for method_name in method_names:
+            method = getattr(obj, method_name)
+            setattr(obj, method_name, self.function(method, f"{type(obj).__name__}.{method_name}"))
+
+    def function(self, func: Callable, name: Optional[str] = None) -> Callable:
+        """Return a profiled version of a function.
+
+        Args:
+            func: The function to be profiled.
+            name: Name of the function in the results. Defaults to its qualified name.
+        """
+        if name is None:
+            name = getattr(func, "__qualname__", repr(func))
+
+        @functools.wraps(func)
+        def profiled(*args, **kwargs):
+            self._enter(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._exit()
+        return profiled
+
+    def to_dataframe(self) -> "pandas.DataFrame":
+        """Return the statistics per simulated time window and profiled process or function.
+
+        The DataFrame has the columns `window` (start of the simulated time window), `name`, `calls`, `wall_time`
+        (seconds, including nested profiled calls), `self_time` (seconds, excluding nested profiled calls) and, if
+        allocations are traced, `allocated` (net number of allocated bytes, including nested calls).
+        """
+        import pandas as pd
+        rows: Dict[Tuple[float, str], List] = {}
+        for (window, stack), (calls, wall_time, self_time, allocated) in self._stats.items():
+            if stack[-1] in stack[:-1]:  # Recursive calls are already contained in the wall time of the outer call
+                wall_time = allocated = 0
+            row = rows.setdefault((window, stack[-1]), [0, 0.0, 0.0, 0])
+            row[0] += calls
+            row[1] += wall_time
+            row[2] += self_time
+            row[3] += allocated
+        columns = ["calls", "wall_time", "self_time", "allocated"]
+        if not self.trace_allocations:
+            columns.pop()
+        df = pd.DataFrame([(window, name, *row[:len(columns)]) for (window, name), row in rows.items()],
+                          columns=["window", "name", *columns])
+        return df.sort_values(["window", "wall_time"], ascending=[True, False], ignore_index=True)
+
+    def collapsed_stacks(self) -> List[str]:
+        """Return the self time of all call stacks in the collapsed stack format, aggregated over all windows.
+
+        Every line has the form `process;function;nested_function <microseconds>`, as expected by
+        `flamegraph.pl <https://github.com/brendangregg/FlameGraph>`_ and `speedscope <https://www.speedscope.app>`_.
+        """
+        self_times: Dict[_Stack, float] = {}
+        for (_, stack), (_, _, self_time, _) in self._stats.items():
+            self_times[stack] = self_times.get(stack, 0) + self_time
+        return [f"{';'.join(stack)} {round(self_time * 1e6)}" for stack, self_time in sorted(self_times.items())]
+
+    def write_collapsed(self, path: str):
+        """Write :meth:`collapsed_stacks` to a file."""
+        with open(path, "w") as f:
+            f.writelines(line + "\n" for line in self.collapsed_stacks())
+
+    def _profiled_process(self, generator: Generator, name: str) -> Generator:
+        value = None
+        exception = None
+        while True:
+            self._enter(name)
+            try:
+                event = generator.send(value) if exception is None else generator.throw(exception)
+            except StopIteration as e:
+                return e.value
+            finally:
+                self._exit()
+            try:
+                value = yield event
+                exception = None
+            except GeneratorExit:
+                generator.close()
+                raise
+            except BaseException as e:  # E.g. simpy.Interrupt, which has to be passed on to the wrapped process
+                exception = e
+
+    def _enter(self, name: str):
+        stack = self._frames[-1][0] + (name,) if self._frames else (name,)
+        window = math.floor(self.env.now / self.window) * self.window if self.window else 0
+        memory = self._traced_memory()
+        self._frames.append([stack, window, time.perf_counter(), 0.0, memory])
+
+    def _exit(self):
+        stack, window, start, nested_time, memory = self._frames.pop()
+        wall_time = time.perf_counter() - start
+        allocated = self._traced_memory() - memory
+        stats = self._stats.get((window, stack))
+        if stats is None:
+            self._stats[(window, stack)] = [1, wall_time, wall_time - nested_time, allocated]
+        else:
+            stats[0] += 1
+            stats[1] += wall_time
+            stats[2] += wall_time - nested_time
+            stats[3] += allocated
+        if self._frames:
+            self._frames[-1][3] += wall_time
+
+    def _traced_memory(self) -> int:
+        if self.trace_allocations and tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[0]
+        return 0
+
+
+def _process_name(generator: Generator) -> str:
+    name = getattr(generator, "__qualname__", type(generator).__name__)
+    frame = getattr(generator, "gi_frame", None)
+    owner = frame.f_locals.get("self") if frame is not None else None
+    owner_name = getattr(owner, "name", None)
+    if isinstance(owner_name, str):
+        name += f"[{owner_name}]"
+    return name
@@ -0,0 +1,217 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import numpy as np
+
+_NPY_HEADER_LENGTH = 128  # Fixed header size of files written by NpySink, leaves room for growing shapes
+
+
+class MeasurementSink(ABC):
+    """Abstract base class for destinations that power measurements are streamed to during the simulation.
+
+    Sinks receive chunks of measurements as (time, dynamic, static) columns and persist them immediately, so results
+    survive if the process dies and the memory of the recording :class:`~leaf.power.PowerMeter` stays constant.
+
+    If a sink is opened with `resume=True`, incomplete trailing records of an existing file are discarded and all new
+    measurements up to :attr:`last_time` are skipped. A rerun of a deterministic simulation hence continues the file
+    where the previous run stopped.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.last_time: Optional[float] = None
+        if resume and os.path.exists(path):
+            self.last_time = self._recover()
+        else:
+            self._create()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}('{self.path}')"
+
+    def write(self, time: np.ndarray, dynamic: np.ndarray, static: np.ndarray):
+        """Persist a chunk of measurements."""
+        if self.last_time is not None:
+            new = time > self.last_time
+            time, dynamic, static = time[new], dynamic[new], static[new]
+        if len(time) == 0:
+            return
+        self._write(time, dynamic, static)
+        self.last_time = float(time[-1])
+
+    def close(self):
+        """Finalize the file. No measurements can be written afterwards."""
+
+    @abstractmethod
+    def _create(self):
+        """Create a new, empty file."""
+
+    @abstractmethod
+    def _recover(self) -> Optional[float]:
+        """Discard incomplete records of an existing file and return the time of the last complete record."""
+
+    @abstractmethod
+    def _write(self, time: np.ndarray, dynamic: np.ndarray, static: np.ndarray):
+        """Append a chunk of measurements to the file."""
+
+
+class CsvSink(MeasurementSink):
+    def __init__(self, path: str, resume: bool = False):
+        """Streams measurements to a CSV file with the columns `time`, `dynamic` and `static`.
+
+        Args:
+            path: Path of the CSV file.
+            resume: Continue an existing file instead of overwriting it.
+        """
+        super().__init__(path, resume)
+
+    def _create(self):
+        with open(self.path, "w") as f:
+            f.write("time,dynamic,static\n")
+
+    def _recover(self) -> Optional[float]:
+        with open(self.path, "rb+") as f:
+            last_line = _truncate_to_last_line(f)
+        if last_line is None:
+            self._create()
+            return None
+        if last_line.startswith(b"time"):
+            return None
+        return float(last_line.split(b",")[0])
+
+    def _write(self, time: np.ndarray, dynamic: np.ndarray, static: np.ndarray):
+        rows = "".join(f"{t!r},{d!r},{s!r}\n" for t, d, s in zip(time.tolist(), dynamic.tolist(), static.tolist()))
+        with open(self.path, "a") as f:
+            f.write(rows)
+
+
+class NpySink(MeasurementSink):
+    def __init__(self, path: str, resume: bool = False):
+        """Streams measurements to a `.npy` file containing a float64 array of shape (n, 3).
+
+        The columns are time, dynamic and static power. The file can be loaded with `numpy.load()` at any time,
+        including `mmap_mode="r"` for very long runs.
+
+        Args:
+            path: Path of the `.npy` file.
+            resume: Continue an existing file instead of overwriting it.
+        """
+        self._header_length = _NPY_HEADER_LENGTH
+        self._rows = 0
+        super().__init__(path, resume)
+
+    def _create(self):
+        self._header_length = _NPY_HEADER_LENGTH
+        self._rows = 0
+        with open(self.path, "wb") as f:
+            f.write(self._header())
+
+    def _recover(self) -> Optional[float]:
+        with open(self.path, "rb+") as f:
+            if np.lib.format.read_magic(f) != (1, 0):
+                raise ValueError(f"Cannot resume '{self.path}': Unsupported .npy format version.")
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            if dtype != np.float64 or fortran_order or len(shape) != 2 or shape[1] != 3:
+                raise ValueError(f"Cannot resume '{self.path}': Not a measurement file written by {self}.")
+            self._header_length = f.tell()
+            size = f.seek(0, os.SEEK_END)
+            self._rows = (size - self._header_length) // (3 * 8)  # May be larger than `shape` after a crash
+            f.truncate(self._header_length + self._rows * 3 * 8)
+            f.seek(0)
+            f.write(self._header())
+            if self._rows == 0:
+                return None
+            f.seek(self._header_length + (self._rows - 1) * 3 * 8)
+            return float(np.frombuffer(f.read(8), dtype=np.float64)[0])
+
+    def _write(self, time: np.ndarray, dynamic: np.ndarray, static: np.ndarray):
+        data = np.column_stack((time, dynamic, static)).astype(np.float64, copy=False)
+        with open(self.path, "rb+") as f:
+            f.seek(self._header_length + self._rows * 3 * 8)
+            f.write(data.tobytes())
+            self._rows += len(data)
+            f.seek(0)
+            f.write(self._header())
+
+    def _header(self) -> bytes:
+        """Return a version 1.0 `.npy` header padded to the fixed header length."""
+        header = f"{{'descr': '<f8', 'fortran_order': False, 'shape': ({self._rows}, 3), }}"
+        prefix = np.lib.format.magic(1, 0) + (self._header_length - 10).to_bytes(2, "little")
+        padding = self._header_length - len(prefix) - len(header) - 1
+        if padding < 0:
+            raise ValueError(f"Header of '{self.path}' is too small for {self._rows} rows.")
+        return prefix + (header + " " * padding + "\n").encode("latin1")
+
+
+class ParquetSink(MeasurementSink):
+    def __init__(self, path: str, resume: bool = False):
+        """Streams measurements to a directory of Parquet files with the columns `time`, `dynamic` and `static`.
+
+        Every chunk is written as a separate part file, so all chunks written so far stay readable even if the
+        process dies. The directory can be read as a whole via `pandas.read_parquet(path)`. Requires `pyarrow`.
+
+        Args:
+            path: Path of the directory.
+            resume: Continue an existing directory instead of overwriting it.
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("ParquetSink requires pyarrow, install it via `pip install leafsim[parquet]`.")
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._parts = 0
+        super().__init__(path, resume)
+
+    def _create(self):
+        os.makedirs(self.path, exist_ok=True)
+        for file in self._part_files():
+            os.remove(os.path.join(self.path, file))
+        self._parts = 0
+
+    def _recover(self) -> Optional[float]:
+        last_time = None
+        self._parts = 0
+        for file in self._part_files():
+            try:
+                table = self._pq.read_table(os.path.join(self.path, file), columns=["time"])
+            except self._pa.ArrowException:  # Incomplete part, e.g. from a crash during writing
+                os.remove(os.path.join(self.path, file))
+                continue
+            if table.num_rows > 0:
+                last_time = table.column("time")[-1].as_py()
+            self._parts = max(self._parts, _part_number(file) + 1)
+        return last_time
+
+    def _write(self, time: np.ndarray, dynamic: np.ndarray, static: np.ndarray):
+        table = self._pa.table({"time": time, "dynamic": dynamic, "static": static})
+        tmp_path = os.path.join(self.path, f".part-{self._parts:06d}.parquet.tmp")
+        self._pq.write_table(table, tmp_path)
+        os.replace(tmp_path, os.path.join(self.path, f"part-{self._parts:06d}.parquet"))
+        self._parts += 1
+
+    def _part_files(self):
+        return sorted(file for file in os.listdir(self.path) if file.startswith("part-") and file.endswith(".parquet"))
+
+
+def _truncate_to_last_line(f, block_size: int = 4096) -> Optional[bytes]:
+    """Truncate a file after its last line break and return the last complete line, or None if there is none."""
+    start = f.seek(0, os.SEEK_END)
+    tail = b""
+    while start > 0 and tail.count(b"\n") < 2:  # Read backwards until the last complete line is contained in `tail`
+        new_start = max(0, start - block_size)
+        f.seek(new_start)
+        tail = f.read(start - new_start) + tail
+        start = new_start
+    last_break = tail.rfind(b"\n")
+    if last_break == -1:
+        f.truncate(0)
+        return None
+    f.truncate(start + last_break + 1)
+    content = tail[:last_break]
+    return content[content.rfind(b"\n") + 1:]
+
+
+def _part_number(file: str) -> int:
+    return int(file[len("part-"):-len(".parquet")])
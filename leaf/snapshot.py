@@ -0,0 +1,242 @@
+import gzip
+import os
+import pickle
+import selectors
+import sys
+import traceback
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, TypeVar
+
+import simpy
+
+from leaf.infrastructure import Link, Node
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+_FORMAT_VERSION = 3
+_ENVIRONMENT_ID = "environment"
+_PROCESS_ID = "process"
+_ENTITY_ID = "entity"
+
+
+def save_snapshot(path: str, state: Any, env: simpy.Environment, compresslevel: int = 6):
+    """Persist the state of a warmed-up simulation to a compressed file.
+
+    The state can be any picklable object graph, e.g. a tuple of the :class:`~leaf.infrastructure.Infrastructure`,
+    the placed applications, power meters, mobility models and random number generators. Every reference to `env` is
+    stored as a persistent reference and bound to the new environment while loading in :func:`load_snapshot`.
+
+    Note:
+        Running SimPy processes are Python generators, which cannot be persisted. References to
+        :class:`simpy.events.Process` objects are restored as None and the processes have to be restarted after loading.
+        Use :func:`fork` to branch off a running simulation including its processes.
+
+    Nodes and links are stored by reference in the object graph and their attributes are stored separately, so the
+    nesting depth of the pickled data does not grow with the size of the infrastructure.
+
+    Args:
+        path: Path of the snapshot file.
+        state: The objects to persist.
+        env: The simulation environment, only its current time is stored.
+        compresslevel: gzip compression level between 0 (fastest) and 9 (smallest).
+    """
+    with gzip.open(path, "wb", compresslevel=compresslevel) as f:
+        pickler = _SnapshotPickler(f, env)
+        try:
+            pickler.dump((_FORMAT_VERSION, env.now))  # Header, read before the environment is created
+            pickler.dump(state)
+            # Entity states can reference further entities, which are written in the next batch
+            written = 0
+            while written < len(pickler.entities):
+                batch = pickler.entities[written:]
+                pickler.dump([(index, _entity_state(entity)) for index, entity in enumerate(batch, written)])
+                written += len(batch)
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            raise ValueError(f"Cannot snapshot the simulation state: {e}. Lambdas and local functions, e.g. "
+                             f"used as entity callbacks of power meters, cannot be persisted. Use module level "
+                             f"functions or functools.partial instead.") from e
+
+
+def load_snapshot(path: str, env: Optional[simpy.Environment] = None) -> Tuple[simpy.Environment, Any]:
+    """Restore a snapshot created by :func:`save_snapshot`.
+
+    Args:
+        path: Path of the snapshot file.
+        env: Environment which replaces the original environment in the restored state. Defaults to a new environment
+            starting at the simulated time at which the snapshot was taken.
+
+    Returns:
+        The environment and the restored state.
+    """
+    with gzip.open(path, "rb") as f:
+        unpickler = _SnapshotUnpickler(f)
+        header = unpickler.load()
+        if not isinstance(header, tuple) or header[0] != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format in '{path}'.")
+        _, now = header
+        if env is None:
+            env = simpy.Environment(initial_time=now)
+        unpickler.env = env
+        state = unpickler.load()
+        while unpickler.pending:
+            for index, entity_state in unpickler.load():
+                _set_entity_state(unpickler.entities[index], entity_state)
+                unpickler.pending.discard(index)
+    return env, state
+
+
+def fork(branches: Iterable[_T], run: Callable[[_T], _R], max_processes: Optional[int] = None) -> List[_R]:
+    """Continue the current simulation in several child processes, one per branch.
+
+    Every child is created via `os.fork()` and therefore starts with a copy-on-write copy of the entire current state,
+    including the SimPy environment and all running processes. Warm-up phases hence only have to be simulated once.
+    The children call `run(branch)`, e.g. to change a parameter and continue the simulation, and send back its
+    (picklable) result.
+
+    Example:
+        ::
+
+            env.run(until=warmup_time)
+            results = fork(seeds, lambda seed: run_remaining_simulation(env, seed))
+
+    Args:
+        branches: One item per child process, which is passed to `run`.
+        run: Function that is executed in the child processes.
+        max_processes: Maximum number of concurrently running children. Defaults to the number of CPUs.
+
+    Returns:
+        The results of `run` in the order of `branches`.
+
+    Raises:
+        RuntimeError: If `run` raised an exception in any of the children or a child exited without a result, e.g.
+            because it was killed. All children are waited for before the error is raised.
+    """
+    if not hasattr(os, "fork"):
+        raise RuntimeError("fork() requires os.fork(), which is not available on this platform.")
+    if max_processes is None:
+        max_processes = os.cpu_count() or 1
+    results: List[Any] = []
+    errors: Dict[int, str] = {}
+    selector = selectors.DefaultSelector()
+    buffers = {}
+
+    def collect():
+        for key, _ in selector.select():
+            fd, (index, pid) = key.fd, key.data
+            chunk = os.read(fd, 1 << 16)
+            if chunk:
+                buffers[index].append(chunk)
+                continue
+            selector.unregister(fd)
+            os.close(fd)
+            _, status = os.waitpid(pid, 0)
+            data = b"".join(buffers.pop(index))
+            if not data:  # The child died before it could send a result, e.g. because it was killed
+                if os.WIFSIGNALED(status):
+                    reason = f"killed by signal {os.WTERMSIG(status)}"
+                else:
+                    reason = f"exit status {os.WEXITSTATUS(status)}"
+                errors[index] = f"Branch {index} failed: Child process {pid} exited without a result ({reason})."
+                continue
+            try:
+                succeeded, payload = pickle.loads(data)
+            except Exception as e:
+                errors[index] = f"Branch {index} failed: Cannot read the result of child process {pid}: {e!r}"
+                continue
+            if succeeded:
+                results[index] = payload
+            else:
+                errors[index] = f"Branch {index} failed:\n{payload}"
+
+    for index, branch in enumerate(branches):
+        while len(buffers) >= max_processes:
+            collect()
+        results.append(None)
+        buffers[index] = []
+        read_fd, write_fd = os.pipe()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:  # Child process
+            os.close(read_fd)
+            try:
+                payload = pickle.dumps((True, run(branch)), protocol=pickle.HIGHEST_PROTOCOL)
+            except BaseException:
+                payload = pickle.dumps((False, traceback.format_exc()))
+            with os.fdopen(write_fd, "wb") as f:
+                f.write(payload)
+            sys.stdout.flush()  # os._exit() skips the interpreter shutdown, which would flush buffered output
+            sys.stderr.flush()
+            os._exit(0)
+        os.close(write_fd)
+        selector.register(read_fd, selectors.EVENT_READ, (index, pid))
+    while buffers:
+        collect()
+    selector.close()
+    if errors:
+        raise RuntimeError("\n".join(errors[index] for index in sorted(errors)))
+    return results
+
+
+class _SnapshotPickler(pickle.Pickler):
+    def __init__(self, file, env: simpy.Environment):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.env = env
+        self.entities: List[Any] = []
+        self._entity_indices: Dict[int, int] = {}
+
+    def persistent_id(self, obj):
+        if obj is self.env:
+            return _ENVIRONMENT_ID
+        if isinstance(obj, simpy.events.Process):
+            return _PROCESS_ID
+        if isinstance(obj, (Node, Link)):
+            index = self._entity_indices.get(id(obj))
+            if index is None:
+                index = self._entity_indices[id(obj)] = len(self.entities)
+                self.entities.append(obj)
+            return _ENTITY_ID, index, type(obj)
+        return None
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, file):
+        super().__init__(file)
+        self.env: Optional[simpy.Environment] = None  # Set after reading the header
+        self.entities: Dict[int, Any] = {}
+        self.pending: Set[int] = set()  # Indices of entities whose state was not loaded yet
+
+    def persistent_load(self, pid):
+        if pid == _ENVIRONMENT_ID:
+            return self.env
+        if pid == _PROCESS_ID:
+            return None
+        if isinstance(pid, tuple) and pid[0] == _ENTITY_ID:
+            _, index, cls = pid
+            entity = self.entities.get(index)
+            if entity is None:
+                entity = self.entities[index] = cls.__new__(cls)
+                self.pending.add(index)
+            return entity
+        raise pickle.UnpicklingError(f"Unknown persistent id '{pid}'.")
+
+
+def _entity_state(entity: Any) -> Any:
+    """Return the state which pickle would store for an entity, i.e. its `__dict__` and/or slot values."""
+    reduced = entity.__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+    return reduced[2] if len(reduced) > 2 else None
+
+
+def _set_entity_state(entity: Any, state: Any):
+    """Restore the state returned by :func:`_entity_state` the same way pickle does."""
+    if hasattr(entity, "__setstate__"):
+        entity.__setstate__(state)
+        return
+    slot_state = None
+    if isinstance(state, tuple) and len(state) == 2:
+        state, slot_state = state
+    if state:
+        entity.__dict__.update(state)
+    if slot_state:
+        for name, value in slot_state.items():
+            setattr(entity, name, value)
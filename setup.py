@@ -32,7 +32,8 @@ if __name__ == "__main__":
             'tqdm',
         ],
         extras_require={
-            "docs": ["sphinx", "alabaster"]
+            "docs": ["sphinx", "alabaster"],
+            "parquet": ["pyarrow"],
         },
         classifiers=[
             "Development Status :: 3 - Alpha",
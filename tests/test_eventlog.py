@@ -0,0 +1,122 @@
+import random
+
+import numpy as np
+import pytest
+import simpy
+
+from leaf.application import Application, ProcessingTask, SinkTask, SourceTask
+from leaf.eventlog import AllocationLog
+from leaf.infrastructure import Infrastructure, Link, Node
+from leaf.orchestrator import Orchestrator
+from leaf.power import PowerMeter, PowerModelLink, PowerModelNode
+
+
+class Sensor(Node):
+    pass
+
+
+class Fog(Node):
+    pass
+
+
+class LeastLoadedFogOrchestrator(Orchestrator):
+    def _processing_task_placement(self, processing_task, application):
+        return min(self.infrastructure.nodes(type_filter=Fog), key=lambda node: node.used_cu)
+
+
+class Scenario:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.infrastructure = Infrastructure()
+        self.cloud = Node("cloud", power_model=PowerModelNode(power_per_cu=0.5))
+        self.fogs = [Fog(f"fog_{i}", cu=400, power_model=PowerModelNode(max_power=200, static_power=30))
+                     for i in range(2)]
+        for fog in self.fogs:
+            self.infrastructure.add_link(Link(fog, self.cloud, bandwidth=1e9, power_model=PowerModelLink(6e-6)))
+        self.sensor_count = 0
+        for _ in range(3):
+            self.add_sensor()
+        self.orchestrator = LeastLoadedFogOrchestrator(self.infrastructure)
+        self.applications = []  # Currently placed applications, except for the fixed one
+        self.all_applications = []
+        self.fixed_application = self.create_application()
+        self.orchestrator.place(self.fixed_application)
+
+    def add_sensor(self):
+        sensor = Sensor(f"sensor_{self.sensor_count}", cu=10,
+                        power_model=PowerModelNode(max_power=1.8, static_power=0.2))
+        self.sensor_count += 1
+        for fog in self.fogs:
+            self.infrastructure.add_link(Link(sensor, fog, bandwidth=3e7, power_model=PowerModelLink(3e-4)))
+
+    def create_application(self) -> Application:
+        application = Application()
+        source = SourceTask(cu=self.rng.randint(1, 2), bound_node=self.rng.choice(self.sensors()))
+        processing = ProcessingTask(cu=self.rng.randint(1, 20))
+        sink = SinkTask(cu=self.rng.randint(1, 5), bound_node=self.cloud)
+        application.add_task(source)
+        application.add_task(processing, incoming_data_flows=[(source, self.rng.randint(100, 1000))])
+        application.add_task(sink, incoming_data_flows=[(processing, self.rng.randint(10, 100))])
+        return application
+
+    def sensors(self):
+        return self.infrastructure.nodes(type_filter=Sensor)
+
+    def run(self, env: simpy.Environment):
+        yield env.timeout(0.5)  # Changes happen between the measurements of the power meters at full seconds
+        while True:
+            operation = self.rng.choice(["place", "place", "deallocate", "add_sensor", "remove_sensor"])
+            if operation == "place":
+                application = self.create_application()
+                self.orchestrator.place(application)
+                self.applications.append(application)
+                self.all_applications.append(application)
+            elif operation == "deallocate" and self.applications:
+                self.applications.pop(self.rng.randrange(len(self.applications))).deallocate()
+            elif operation == "add_sensor":
+                self.add_sensor()
+            elif operation == "remove_sensor":
+                idle_sensors = [sensor for sensor in self.sensors() if not sensor.tasks]
+                if len(idle_sensors) > 1:
+                    self.infrastructure.remove_node(self.rng.choice(idle_sensors))
+            yield env.timeout(self.rng.choice([1, 2]))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_replay_equals_power_meters(seed):
+    env = simpy.Environment()
+    scenario = Scenario(seed)
+    infrastructure = scenario.infrastructure
+    fixed_source = scenario.fixed_application.tasks(type_filter=SourceTask)[0]
+    fixed_data_flow = scenario.fixed_application.data_flows()[0]
+    with AllocationLog(infrastructure, env) as log:
+        env.process(scenario.run(env))
+        power_meters = [
+            PowerMeter(infrastructure, name="infrastructure"),
+            PowerMeter(lambda: infrastructure.nodes(type_filter=Sensor), name="sensors"),
+            PowerMeter(lambda: infrastructure.links(), name="links"),
+            PowerMeter(lambda: list(scenario.applications), name="applications"),
+            PowerMeter([scenario.fixed_application, fixed_source, fixed_data_flow], name="fixed"),
+        ]
+        for power_meter in power_meters:
+            env.process(power_meter.run(env))
+        env.run(until=100)
+    loads = [node.used_cu for node in infrastructure.nodes()]
+
+    series = log.replay({
+        "infrastructure": lambda state: state.nodes() + state.links(),
+        "sensors": lambda state: state.nodes(type_filter=Sensor),
+        "links": lambda state: state.links(),
+        "applications": lambda state: [application for application in scenario.all_applications
+                                       if state.node_of(application.tasks()[0]) is not None],
+        "fixed": [scenario.fixed_application, fixed_source, fixed_data_flow],
+    })
+
+    for power_meter in power_meters:
+        expected, actual = power_meter.measurements, series[power_meter.name]
+        assert np.array_equal(expected.time, actual.time)
+        assert np.array_equal(expected.dynamic, actual.dynamic)
+        assert np.array_equal(expected.static, actual.static)
+    assert loads == [node.used_cu for node in infrastructure.nodes()]  # Replaying does not modify entities
+    for entity in infrastructure.nodes() + infrastructure.links():
+        assert not entity._load_listeners and not entity._allocation_listeners
@@ -0,0 +1,81 @@
+import random
+
+import networkx as nx
+import pytest
+
+from leaf.infrastructure import Infrastructure, Link, Node
+from leaf.orchestrator import PathCache
+from leaf.power import PowerModelLink
+
+
+def random_link(rng: random.Random, nodes) -> Link:
+    src, dst = rng.sample(nodes, 2)
+    return Link(src, dst, bandwidth=1000, power_model=PowerModelLink(0), latency=rng.randint(1, 10))
+
+
+def assert_shortest_path(graph: nx.MultiDiGraph, path, source: str, target: str):
+    expected_length = nx.single_source_dijkstra(graph, source, target, weight="latency")[0]
+    assert path[0] == source and path[-1] == target
+    assert nx.is_path(graph, path)
+    assert nx.path_weight(graph, path, "latency") == expected_length
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_cached_paths_equal_fresh_shortest_paths(seed):
+    rng = random.Random(seed)
+    infrastructure = Infrastructure()
+    for i in range(15):
+        infrastructure.add_node(Node(f"n{i}"))
+    for _ in range(40):
+        infrastructure.add_link(random_link(rng, infrastructure.nodes()))
+    cache = PathCache(infrastructure)
+    node_count = len(infrastructure.nodes())
+
+    for _ in range(300):
+        operation = rng.choice(["add_node", "add_link", "remove_link", "remove_node", "change_latency"])
+        nodes, links = infrastructure.nodes(), infrastructure.links()
+        if operation == "add_node":
+            node = Node(f"n{node_count}")
+            node_count += 1
+            infrastructure.add_link(Link(node, rng.choice(nodes), bandwidth=1000, power_model=PowerModelLink(0)))
+        elif operation == "add_link":
+            infrastructure.add_link(random_link(rng, nodes))
+        elif operation == "remove_link" and links:
+            infrastructure.remove_link(rng.choice(links))
+        elif operation == "remove_node" and len(nodes) > 5:
+            infrastructure.remove_node(rng.choice(nodes))
+        elif operation == "change_latency" and links:
+            link = rng.choice(links)
+            link.latency = rng.randint(1, 10)
+            for _, _, data in infrastructure.graph.edges(data=True):
+                if data["data"] is link:
+                    data["latency"] = link.latency
+            infrastructure.topology_changed()
+
+        graph = infrastructure.graph
+        names = [node.name for node in infrastructure.nodes()]
+        for _ in range(10):
+            source, target = rng.sample(names, 2)
+            try:
+                path = cache.shortest_path(graph, source, target)
+            except nx.NetworkXNoPath:
+                assert not nx.has_path(graph, source, target)
+                continue
+            assert_shortest_path(graph, path, source, target)
+        source = rng.choice(names)
+        targets = [name for name in names if name != source and nx.has_path(graph, source, name)]
+        for target, path in cache.shortest_paths(graph, source, targets).items():
+            assert_shortest_path(graph, path, source, target)
+
+    assert cache.hits > 0
+
+
+def test_closed_cache_stops_listening():
+    infrastructure = Infrastructure()
+    a, b = Node("a"), Node("b")
+    infrastructure.add_link(Link(a, b, bandwidth=1000, power_model=PowerModelLink(0)))
+    cache = PathCache(infrastructure)
+    cache.shortest_path(infrastructure.graph, "a", "b")
+    cache.close()
+    assert len(cache) == 0
+    assert cache._on_topology_change not in infrastructure._topology_listeners
@@ -0,0 +1,108 @@
+import random
+
+import pytest
+
+from leaf.application import DataFlow, Task
+from leaf.infrastructure import Infrastructure, Link, Node
+from leaf.power import PowerMeasurement, PowerModelLink, PowerModelNode
+
+
+class EdgeNode(Node):
+    pass
+
+
+class SleepingNode(Node):
+    """Node with an overridden `measure_power()`, which the vectorized engine has to measure individually."""
+
+    def measure_power(self) -> PowerMeasurement:
+        if self.used_cu == 0:
+            return PowerMeasurement(0, 0)
+        return super().measure_power()
+
+
+class WanLink(Link):
+    pass
+
+
+def naive_power(infrastructure: Infrastructure, type_filter=None) -> PowerMeasurement:
+    entities = infrastructure.nodes(type_filter=type_filter) + infrastructure.links(type_filter=type_filter)
+    return PowerMeasurement.sum(entity.measure_power() for entity in entities)
+
+
+def assert_power_equal(actual: PowerMeasurement, expected: PowerMeasurement):
+    assert actual.dynamic == pytest.approx(expected.dynamic, rel=1e-9, abs=1e-6)
+    assert actual.static == pytest.approx(expected.static, rel=1e-9, abs=1e-6)
+
+
+def random_node(rng: random.Random, i: int) -> Node:
+    cls = rng.choice([Node, EdgeNode, SleepingNode])
+    choice = rng.randrange(3)
+    if choice == 0:
+        return cls(f"n{i}", cu=rng.randint(1, 100),
+                   power_model=PowerModelNode(max_power=rng.uniform(50, 200), static_power=rng.uniform(0, 50)))
+    if choice == 1:
+        return cls(f"n{i}", cu=rng.choice([None, rng.randint(1, 100)]),
+                   power_model=PowerModelNode(power_per_cu=rng.uniform(0, 2), static_power=rng.uniform(0, 10)))
+    return cls(f"n{i}", cu=rng.randint(1, 100))
+
+
+def random_link(rng: random.Random, nodes) -> Link:
+    src, dst = rng.sample(nodes, 2)
+    cls = rng.choice([Link, WanLink])
+    return cls(src, dst, bandwidth=rng.randint(1000, 1000000), power_model=PowerModelLink(rng.uniform(1e-9, 1e-6)))
+
+
+@pytest.mark.parametrize("engine", ["incremental", "vectorized"])
+@pytest.mark.parametrize("seed", range(5))
+def test_power_engines_equal_naive_sum(engine, seed):
+    rng = random.Random(seed)
+    infrastructure = Infrastructure(incremental_power=engine == "incremental", vectorized_power=engine == "vectorized")
+    node_count = 0
+    for _ in range(10):
+        infrastructure.add_node(random_node(rng, node_count))
+        node_count += 1
+    for _ in range(15):
+        infrastructure.add_link(random_link(rng, infrastructure.nodes()))
+    tasks, data_flows = [], []
+
+    for _ in range(500):
+        operation = rng.choice(["add_node", "add_link", "remove_link", "remove_node", "allocate_task",
+                                "deallocate_task", "allocate_data_flow", "deallocate_data_flow"])
+        nodes, links = infrastructure.nodes(), infrastructure.links()
+        if operation == "add_node":
+            infrastructure.add_node(random_node(rng, node_count))
+            node_count += 1
+        elif operation == "add_link" and len(nodes) >= 2:
+            infrastructure.add_link(random_link(rng, nodes))
+        elif operation == "remove_link" and links:
+            infrastructure.remove_link(rng.choice(links))
+        elif operation == "remove_node" and len(nodes) > 3:
+            infrastructure.remove_node(rng.choice(nodes))
+        elif operation == "allocate_task" and nodes:
+            task = Task(cu=rng.randint(1, 20))
+            try:
+                task.allocate(rng.choice(nodes))
+            except ValueError:
+                continue
+            tasks.append(task)
+        elif operation == "deallocate_task" and tasks:
+            tasks.pop(rng.randrange(len(tasks))).deallocate()
+        elif operation == "allocate_data_flow" and links:
+            data_flow = DataFlow(bit_rate=rng.randint(1, 100000))
+            try:
+                data_flow.allocate(rng.sample(links, rng.randint(1, min(3, len(links)))))
+            except ValueError:
+                continue
+            data_flows.append(data_flow)
+        elif operation == "deallocate_data_flow" and data_flows:
+            data_flows.pop(rng.randrange(len(data_flows))).deallocate()
+
+        assert_power_equal(infrastructure.measure_power(), naive_power(infrastructure))
+        for type_filter in (EdgeNode, SleepingNode, WanLink, (EdgeNode, WanLink)):
+            assert_power_equal(infrastructure.measure_power(type_filter=type_filter),
+                               naive_power(infrastructure, type_filter))
+
+
+def test_power_engines_cannot_be_combined():
+    with pytest.raises(ValueError):
+        Infrastructure(incremental_power=True, vectorized_power=True)
@@ -0,0 +1,62 @@
+import os
+import signal
+import sys
+
+import pytest
+import simpy
+
+from leaf.application import Task
+from leaf.infrastructure import Infrastructure, Link, Node
+from leaf.power import PowerModelLink, PowerModelNode
+from leaf.snapshot import fork, load_snapshot, save_snapshot
+
+requires_fork = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork()")
+
+
+def chain_infrastructure(size: int) -> Infrastructure:
+    infrastructure = Infrastructure()
+    nodes = [Node(f"n{i}", cu=10, power_model=PowerModelNode(power_per_cu=1, static_power=1)) for i in range(size)]
+    for src, dst in zip(nodes, nodes[1:]):
+        infrastructure.add_link(Link(src, dst, bandwidth=100, power_model=PowerModelLink(1), latency=1))
+    return infrastructure
+
+
+def test_snapshot_round_trip_of_long_chain(tmp_path):
+    env = simpy.Environment(initial_time=42)
+    infrastructure = chain_infrastructure(sys.getrecursionlimit() * 2)
+    Task(cu=3).allocate(infrastructure.nodes()[-1])
+    path = str(tmp_path / "snapshot.gz")
+    save_snapshot(path, infrastructure, env)
+
+    restored_env, restored = load_snapshot(path)
+    assert restored_env.now == 42
+    assert [node.name for node in restored.nodes()] == [node.name for node in infrastructure.nodes()]
+    measurement, expected = restored.measure_power(), infrastructure.measure_power()
+    assert (measurement.dynamic, measurement.static) == (expected.dynamic, expected.static)
+    assert restored.nodes()[-1].used_cu == 3
+    assert restored.links()[0].src is restored.nodes()[0]
+
+
+@requires_fork
+def test_fork_returns_results_in_order():
+    assert fork(range(5), lambda i: i * i, max_processes=2) == [0, 1, 4, 9, 16]
+
+
+def _fail_or_die(branch: int) -> int:
+    if branch == 1:
+        raise ValueError("broken branch")
+    if branch == 2:
+        os.kill(os.getpid(), signal.SIGKILL)
+    return branch
+
+
+@requires_fork
+def test_fork_reports_failed_and_killed_children():
+    with pytest.raises(RuntimeError) as exc_info:
+        fork(range(4), _fail_or_die, max_processes=2)
+    message = str(exc_info.value)
+    assert "Branch 1 failed" in message and "ValueError: broken branch" in message
+    assert "Branch 2 failed" in message and f"killed by signal {signal.SIGKILL}" in message
+    assert "Branch 0" not in message and "Branch 3" not in message
+    with pytest.raises(ChildProcessError):  # All children were waited for
+        os.waitpid(-1, os.WNOHANG)